@@ -1,16 +1,35 @@
 import sys
 import os
+import csv
+import ctypes
+import hashlib
 import json
+import locale
+import multiprocessing
+import platform
+import queue
+import re
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+import wave
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QPushButton, QFileDialog, QLabel, QSlider, QMessageBox,
                             QHBoxLayout, QFrame, QMenu, QMenuBar, QListWidget,
                             QListWidgetItem, QDockWidget, QToolButton, QStyle,
                             QComboBox, QSpinBox, QGroupBox, QGridLayout, QCheckBox,
-                            QFontDialog)
-from PyQt6.QtCore import Qt, QTimer, QSize, QPoint, QMimeData, QUrl
-from PyQt6.QtGui import QIcon, QFont, QAction, QColor, QDrag
+                            QFontDialog, QInputDialog, QTableView, QAbstractItemView,
+                            QHeaderView)
+from PyQt6.QtCore import (Qt, QTimer, QSize, QPoint, QMimeData, QUrl, QObject, pyqtSignal,
+                          QAbstractTableModel, QModelIndex)
+from PyQt6.QtGui import QIcon, QFont, QAction, QActionGroup, QColor, QDrag, QPainter
 import vlc
 
 class PlaybackMode(Enum):
@@ -26,12 +45,2079 @@ class VideoAdjustment(Enum):
     SATURATION = 'Saturation'
     GAMMA = 'Gamma'
 
+class CrossfadeCurve(Enum):
+    LINEAR = 'Linear'
+    EQUAL_POWER = 'Equal Power'
+    S_CURVE = 'S-Curve'
+
+class PlayEvent(Enum):
+    PLAYED = 0
+    SKIPPED = 1
+
+VIDEO_EXTENSIONS = ('.mp4', '.m4v', '.mkv', '.avi', '.mov', '.webm', '.wmv', '.mpg', '.mpeg', '.ts', '.flv')
+
+class ExportProfile(Enum):
+    MP3 = 'MP3 (192 kbps)'
+    FLAC = 'FLAC'
+    OGG = 'Ogg Vorbis'
+    WAV = 'WAV (16-bit PCM)'
+    MP4 = 'MP4 (H.264/AAC)'
+    REMUX = 'Remux (copy streams to MKV)'
+
+# File extension and VLC stream output chain for each export profile
+EXPORT_PROFILES = {
+    ExportProfile.MP3: ('mp3', '#transcode{vcodec=none,scodec=none,acodec=mp3,ab=192,channels=2,samplerate=44100}:std{access=file,mux=raw,dst="%s"}'),
+    ExportProfile.FLAC: ('flac', '#transcode{vcodec=none,scodec=none,acodec=flac}:std{access=file,mux=raw,dst="%s"}'),
+    ExportProfile.OGG: ('ogg', '#transcode{vcodec=none,scodec=none,acodec=vorb,ab=192}:std{access=file,mux=ogg,dst="%s"}'),
+    ExportProfile.WAV: ('wav', '#transcode{vcodec=none,scodec=none,acodec=s16l}:std{access=file,mux=wav,dst="%s"}'),
+    ExportProfile.MP4: ('mp4', '#transcode{vcodec=h264,acodec=mp4a,ab=192,scodec=none}:std{access=file,mux=mp4,dst="%s"}'),
+    ExportProfile.REMUX: ('mkv', '#std{access=file,mux=mkv,dst="%s"}'),
+}
+
 class EqualizerBand:
     def __init__(self, freq, amp):
         self.frequency = freq
         self.amplitude = amp
         self.slider = None
 
+class CrossfadeEngine:
+    STEP_MS = 10
+
+    def __init__(self):
+        self.curve = CrossfadeCurve.EQUAL_POWER
+        self.duration = 6000
+        self.volume = 50
+        self.tables = {}
+        self.thread = None
+        self.cancel_event = threading.Event()
+
+    def isActive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def gainTable(self, duration):
+        # Row 0 is the outgoing envelope, row 1 the incoming one, one column per step
+        steps = max(int(duration) // self.STEP_MS, 1)
+        key = (self.curve, steps)
+        if key not in self.tables:
+            t = np.linspace(0.0, 1.0, steps + 1)
+            if self.curve == CrossfadeCurve.LINEAR:
+                fade_in = t
+                fade_out = 1.0 - t
+            elif self.curve == CrossfadeCurve.EQUAL_POWER:
+                fade_in = np.sin(t * np.pi / 2)
+                fade_out = np.cos(t * np.pi / 2)
+            else:
+                fade_in = 0.5 - 0.5 * np.cos(t * np.pi)
+                fade_out = 1.0 - fade_in
+            self.tables[key] = np.stack((fade_out, fade_in))
+        return self.tables[key]
+
+    def start(self, outgoing, incoming, duration=None):
+        self.cancel()
+        table = self.gainTable(duration or self.duration)
+        self.cancel_event.clear()
+        self.thread = threading.Thread(target=self.run, args=(outgoing, incoming, table), daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        if self.isActive():
+            self.cancel_event.set()
+            self.thread.join()
+
+    def run(self, outgoing, incoming, table):
+        step = self.STEP_MS / 1000.0
+        last_step = table.shape[1] - 1
+        levels = [-1, -1]
+        start = time.perf_counter()
+        try:
+            while not self.cancel_event.is_set():
+                # Index by elapsed time so a late wakeup catches up instead of stretching the fade
+                i = min(int((time.perf_counter() - start) / step), last_step)
+                for player, row in ((outgoing, 0), (incoming, 1)):
+                    level = int(round(table[row, i] * self.volume))
+                    if level != levels[row]:
+                        player.audio_set_volume(level)
+                        levels[row] = level
+                if i == last_step:
+                    break
+                self.cancel_event.wait(max(start + (i + 1) * step - time.perf_counter(), 0))
+        except Exception as e:
+            print(f"Warning: Crossfade interrupted: {str(e)}")
+        finally:
+            outgoing.stop()
+            incoming.audio_set_volume(self.volume)
+
+class PlayHistory:
+    # Packed on-disk record, appended to the log as-is
+    RECORD = np.dtype([('time', '<f8'), ('track', '<u4'), ('event', 'u1'),
+                       ('count', '<u4'), ('position', '<u4')])
+    RETENTION = 90 * 24 * 3600
+    COMPACT_THRESHOLD = 1000000
+
+    def __init__(self, log_path='play_history.bin', tracks_path='play_history_tracks.txt'):
+        self.log_path = log_path
+        self.tracks_path = tracks_path
+        self.tracks = []
+        self.track_ids = {}
+        self.events = np.zeros(1024, dtype=self.RECORD)
+        self.size = 0
+        self.play_count = np.zeros(0, dtype=np.uint32)
+        self.skip_count = np.zeros(0, dtype=np.uint32)
+        self.last_played = np.zeros(0, dtype=np.float64)
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.load()
+        self.compact_at = max(self.COMPACT_THRESHOLD, 2 * self.size)
+        self.writer = threading.Thread(target=self.writeLoop, daemon=True)
+        self.writer.start()
+
+    def load(self):
+        try:
+            if os.path.exists(self.tracks_path):
+                with open(self.tracks_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        self.addTrack(line.rstrip('\n'))
+            if os.path.exists(self.log_path):
+                # Ignore a partial record left by an interrupted write
+                count = os.path.getsize(self.log_path) // self.RECORD.itemsize
+                data = np.fromfile(self.log_path, dtype=self.RECORD, count=count)
+                data = data[data['track'] < len(self.tracks)]
+                self.events = np.zeros(max(len(data) * 2, 1024), dtype=self.RECORD)
+                self.events[:len(data)] = data
+                self.size = len(data)
+        except Exception as e:
+            print(f"Error loading play history: {str(e)}")
+        self.rebuildAggregates()
+
+    def rebuildAggregates(self):
+        n = len(self.tracks)
+        events = self.events[:self.size]
+        for event, name in ((PlayEvent.PLAYED, 'play_count'), (PlayEvent.SKIPPED, 'skip_count')):
+            mask = events['event'] == event.value
+            counts = np.bincount(events['track'][mask], weights=events['count'][mask], minlength=n)
+            setattr(self, name, counts.astype(np.uint32))
+        self.last_played = np.zeros(n, dtype=np.float64)
+        played = events['event'] == PlayEvent.PLAYED.value
+        np.maximum.at(self.last_played, events['track'][played], events['time'][played])
+
+    def addTrack(self, path):
+        track = len(self.tracks)
+        self.tracks.append(path)
+        self.track_ids[path] = track
+        if track >= len(self.play_count):
+            capacity = max(2 * len(self.play_count), 256)
+            self.play_count = np.resize(self.play_count, capacity)
+            self.skip_count = np.resize(self.skip_count, capacity)
+            self.last_played = np.resize(self.last_played, capacity)
+            self.play_count[track:] = 0
+            self.skip_count[track:] = 0
+            self.last_played[track:] = 0
+        return track
+
+    def record(self, path, event, position=0):
+        with self.lock:
+            track = self.track_ids.get(path)
+            if track is None:
+                track = self.addTrack(path)
+                self.queue.put(('track', path))
+            if self.size == len(self.events):
+                self.events = np.resize(self.events, 2 * len(self.events))
+            entry = self.events[self.size:self.size + 1]
+            entry['time'] = time.time()
+            entry['track'] = track
+            entry['event'] = event.value
+            entry['count'] = 1
+            entry['position'] = max(int(position), 0)
+            self.size += 1
+
+            if event == PlayEvent.PLAYED:
+                self.play_count[track] += 1
+                self.last_played[track] = entry['time'][0]
+            else:
+                self.skip_count[track] += 1
+            self.queue.put(('event', entry.tobytes()))
+
+    def stats(self, path):
+        track = self.track_ids.get(path)
+        if track is None:
+            return {'play_count': 0, 'skip_count': 0, 'skip_rate': 0.0, 'last_played': None}
+        plays = int(self.play_count[track])
+        skips = int(self.skip_count[track])
+        return {
+            'play_count': plays,
+            'skip_count': skips,
+            'skip_rate': skips / (plays + skips) if plays + skips else 0.0,
+            'last_played': float(self.last_played[track]) or None
+        }
+
+    def topTracks(self, limit=100, since=None, event=PlayEvent.PLAYED):
+        with self.lock:
+            events = self.events[:self.size]
+            n = len(self.tracks)
+        # The log is time-ordered, so a time window is a contiguous slice.
+        # Compacted summaries carry their newest timestamp, so windows reaching
+        # past RETENTION are approximate.
+        if since is not None:
+            events = events[np.searchsorted(events['time'], since):]
+        mask = events['event'] == event.value
+        counts = np.bincount(events['track'][mask], weights=events['count'][mask], minlength=n)
+        limit = min(limit, int(np.count_nonzero(counts)))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-counts, limit - 1)[:limit]
+        top = top[np.argsort(-counts[top], kind='stable')]
+        return [(self.tracks[i], int(counts[i])) for i in top]
+
+    def compact(self):
+        # Collapse events older than RETENTION into one summary record per
+        # track and event type; aggregates are unchanged by this.
+        with self.lock:
+            size = self.size
+            events = self.events[:size].copy()
+        cutoff = time.time() - self.RETENTION
+        old = events[:np.searchsorted(events['time'], cutoff)]
+        if len(old) == 0:
+            # Nothing to collapse yet; wait for the log to double before trying again
+            self.compact_at = max(self.COMPACT_THRESHOLD, 2 * size)
+            return
+        keys = old['track'].astype(np.int64) * 2 + old['event']
+        unique, inverse = np.unique(keys, return_inverse=True)
+        summary = np.zeros(len(unique), dtype=self.RECORD)
+        summary['track'] = unique // 2
+        summary['event'] = unique % 2
+        summary['count'] = np.bincount(inverse, weights=old['count'])
+        np.maximum.at(summary['time'], inverse, old['time'])
+        summary = summary[np.argsort(summary['time'], kind='stable')]
+        compacted = np.concatenate((summary, events[len(old):]))
+
+        with self.lock:
+            tail = self.events[size:self.size]
+            self.events = np.zeros(max(2 * (len(compacted) + len(tail)), 1024), dtype=self.RECORD)
+            self.events[:len(compacted)] = compacted
+            self.events[len(compacted):len(compacted) + len(tail)] = tail
+            self.size = len(compacted) + len(tail)
+            tmp_path = self.log_path + '.tmp'
+            self.events[:self.size].tofile(tmp_path)
+            os.replace(tmp_path, self.log_path)
+            # Queued events are now part of the rewritten log; keep the rest
+            pending = []
+            while not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is None or item[0] == 'track':
+                    pending.append(item)
+            for item in pending:
+                self.queue.put(item)
+        self.compact_at = max(self.COMPACT_THRESHOLD, 2 * self.size)
+
+    def writeLoop(self):
+        log = None
+        tracks = None
+        while True:
+            item = self.queue.get()
+            try:
+                if log is None:
+                    log = open(self.log_path, 'ab')
+                    tracks = open(self.tracks_path, 'a', encoding='utf-8')
+                batch = [item]
+                while not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                for entry in batch:
+                    if entry is None:
+                        break
+                    kind, payload = entry
+                    if kind == 'track':
+                        tracks.write(payload + '\n')
+                    else:
+                        log.write(payload)
+                tracks.flush()
+                log.flush()
+                if None in batch:
+                    log.close()
+                    tracks.close()
+                    return
+                if self.size >= self.compact_at:
+                    log.close()
+                    log = None
+                    tracks.close()
+                    self.compact()
+            except Exception as e:
+                print(f"Warning: Could not write play history: {str(e)}")
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join(timeout=2)
+
+class MediaLibrary:
+    TEXT_FIELDS = ('title', 'artist', 'album', 'genre')
+    NUMBER_FIELDS = ('duration', 'year', 'play_count', 'skip_count', 'last_played', 'bpm',
+                     'trim_start', 'trim_end', 'intro_end', 'outro_start')
+    # Counts start at 0; other numbers are NaN until known
+    COUNT_FIELDS = ('play_count', 'skip_count')
+
+    def __init__(self, path='media_library.json'):
+        self.path = path
+        self.paths = []
+        self.rows = {}
+        # Folder -> paths in it, so neighbouring files are found without a library scan
+        self.folders = {}
+        # Text columns are dictionary-encoded; code 0 is the empty value
+        self.vocab = {field: [''] for field in self.TEXT_FIELDS}
+        self.codes = {field: {'': 0} for field in self.TEXT_FIELDS}
+        self.columns = {field: np.zeros(1024, dtype=np.int32) for field in self.TEXT_FIELDS}
+        for field in self.NUMBER_FIELDS:
+            self.columns[field] = np.full(1024, self.emptyValue(field))
+        self.indexes = {}
+        self.revision = 0
+        self.listeners = []
+        self.load()
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def emptyValue(cls, field):
+        return 0.0 if field in cls.TEXT_FIELDS or field in cls.COUNT_FIELDS else np.nan
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.paths = list(data.get('paths', []))
+                self.rows = {path: row for row, path in enumerate(self.paths)}
+                self.folders = {}
+                for path in self.paths:
+                    self.folders.setdefault(os.path.dirname(path), []).append(path)
+                n = len(self.paths)
+                capacity = max(1024, 2 * n)
+                for field in self.TEXT_FIELDS:
+                    column = np.zeros(capacity, dtype=np.int32)
+                    for row, value in enumerate(data.get('fields', {}).get(field, [])[:n]):
+                        key = str(value or '').strip().casefold()
+                        if key not in self.codes[field]:
+                            self.codes[field][key] = len(self.vocab[field])
+                            self.vocab[field].append(str(value).strip())
+                        column[row] = self.codes[field][key]
+                    self.columns[field] = column
+                for field in self.NUMBER_FIELDS:
+                    column = np.full(capacity, self.emptyValue(field))
+                    values = data.get('fields', {}).get(field, [])[:n]
+                    column[:len(values)] = np.array(values, dtype=float)
+                    if field in self.COUNT_FIELDS:
+                        # Libraries saved before counts defaulted to 0 stored them as null
+                        np.nan_to_num(column, copy=False, nan=0.0)
+                    self.columns[field] = column
+        except Exception as e:
+            print(f"Error loading media library: {str(e)}")
+
+    def save(self):
+        try:
+            n = len(self.paths)
+            fields = {}
+            for field in self.columns:
+                if field in self.TEXT_FIELDS:
+                    fields[field] = [self.vocab[field][code] for code in self.columns[field][:n]]
+                else:
+                    fields[field] = [None if np.isnan(v) else float(v) for v in self.columns[field][:n]]
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'paths': self.paths, 'fields': fields}, f)
+        except Exception as e:
+            print(f"Error saving media library: {str(e)}")
+
+    def addTrack(self, path, notify=True):
+        if path in self.rows:
+            return self.rows[path]
+        row = len(self.paths)
+        self.paths.append(path)
+        self.rows[path] = row
+        self.folders.setdefault(os.path.dirname(path), []).append(path)
+        if row >= len(self.columns['title']):
+            for field, column in self.columns.items():
+                grown = np.resize(column, 2 * len(column))
+                grown[len(column):] = self.emptyValue(field)
+                self.columns[field] = grown
+        self.indexes.clear()
+        self.revision += 1
+        if notify:
+            self.notify(row)
+        return row
+
+    def updateTrack(self, path, notify=True, **fields):
+        row = self.addTrack(path, notify=False)
+        for field, value in fields.items():
+            if field in self.TEXT_FIELDS:
+                value = str(value or '').strip()
+                key = value.casefold()
+                if key not in self.codes[field]:
+                    self.codes[field][key] = len(self.vocab[field])
+                    self.vocab[field].append(value)
+                value = self.codes[field][key]
+            elif value is None:
+                value = self.emptyValue(field)
+            self.columns[field][row] = value
+            self.indexes.pop(field, None)
+        self.revision += 1
+        if notify:
+            self.notify(row)
+        return row
+
+    def notify(self, row):
+        for listener in self.listeners:
+            listener(row)
+
+    def value(self, row, field):
+        value = self.columns[field][row]
+        if field in self.TEXT_FIELDS:
+            return self.vocab[field][value]
+        return float(value)
+
+    def siblings(self, path):
+        # Files in the same folder with the same extension, sorted by name
+        extension = os.path.splitext(path)[1].lower()
+        return sorted(p for p in self.folders.get(os.path.dirname(path), [])
+                      if os.path.splitext(p)[1].lower() == extension)
+
+    def hasMetadata(self, path):
+        row = self.rows.get(path)
+        return row is not None and not np.isnan(self.columns['duration'][row])
+
+    def column(self, field):
+        return self.columns[field][:len(self.paths)]
+
+    def sortedIndex(self, field):
+        # Rebuilt lazily after the column changes; NaNs sort to the end
+        if field not in self.indexes:
+            column = self.column(field)
+            order = np.argsort(column, kind='stable')
+            self.indexes[field] = (order, column[order])
+        return self.indexes[field]
+
+    def rowsEqual(self, field, value):
+        if field in self.TEXT_FIELDS:
+            value = self.codes[field].get(str(value).casefold())
+            if value is None:
+                return np.zeros(0, dtype=np.intp)
+        order, values = self.sortedIndex(field)
+        return order[np.searchsorted(values, value, 'left'):np.searchsorted(values, value, 'right')]
+
+    def rowsInRange(self, field, low=None, high=None, include_low=True, include_high=True):
+        order, values = self.sortedIndex(field)
+        start = 0 if low is None else np.searchsorted(values, low, 'left' if include_low else 'right')
+        if high is None:
+            end = np.searchsorted(values, np.inf, 'right')
+        else:
+            end = np.searchsorted(values, high, 'right' if include_high else 'left')
+        return order[start:end]
+
+    def rowsContaining(self, field, text):
+        text = str(text).casefold()
+        codes = [code for key, code in self.codes[field].items() if key and text in key]
+        return np.flatnonzero(np.isin(self.column(field), codes))
+
+class RuleCondition:
+    # Values are converted to the stored units: milliseconds and epoch seconds
+    UNITS = {
+        's': 1000, 'sec': 1000, 'secs': 1000, 'seconds': 1000,
+        'm': 60000, 'min': 60000, 'mins': 60000, 'minutes': 60000,
+        'h': 3600000, 'hour': 3600000, 'hours': 3600000,
+        'day': 86400, 'days': 86400, 'week': 604800, 'weeks': 604800,
+        'month': 2592000, 'months': 2592000, 'year': 31536000, 'years': 31536000
+    }
+    FIELDS = {'plays': 'play_count', 'skips': 'skip_count', 'length': 'duration'}
+
+    def __init__(self, field, op, value, unit=None):
+        self.field = self.FIELDS.get(field, field)
+        if self.field not in MediaLibrary.TEXT_FIELDS + MediaLibrary.NUMBER_FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+        self.op = op
+        self.relative = False
+        if self.field in MediaLibrary.TEXT_FIELDS:
+            if op not in ('=', '!=', '~'):
+                raise ValueError(f"Operator {op} is not supported for {field}")
+            self.value = value
+        else:
+            if op == '~':
+                raise ValueError(f"Operator ~ is not supported for {field}")
+            self.value = float(value) * self.UNITS.get(unit, 1000 if self.field == 'duration' else 1)
+            # Dates are given as an age ("last_played > 30 days" means older than 30 days)
+            self.relative = self.field == 'last_played'
+
+    def bounds(self, now):
+        if not self.relative:
+            return self.op, self.value
+        flipped = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}
+        return flipped.get(self.op, self.op), now - self.value
+
+    def evaluate(self, library, now):
+        mask = np.zeros(len(library), dtype=bool)
+        op, value = self.bounds(now)
+        if op == '~':
+            mask[library.rowsContaining(self.field, value)] = True
+            return mask
+        if op in ('=', '!='):
+            mask[library.rowsEqual(self.field, value)] = True
+        elif op in ('<', '<='):
+            mask[library.rowsInRange(self.field, high=value, include_high=op == '<=')] = True
+        else:
+            mask[library.rowsInRange(self.field, low=value, include_low=op == '>=')] = True
+        return ~mask if op == '!=' else mask
+
+    def matches(self, library, row, now):
+        op, value = self.bounds(now)
+        current = library.value(row, self.field)
+        if self.field in MediaLibrary.TEXT_FIELDS:
+            current = current.casefold()
+            value = str(value).casefold()
+            if op == '~':
+                return bool(value) and value in current
+        elif np.isnan(current):
+            return op == '!='
+        return {
+            '=': current == value, '!=': current != value,
+            '<': current < value, '<=': current <= value,
+            '>': current > value, '>=': current >= value
+        }[op]
+
+class RuleNode:
+    def __init__(self, op, children):
+        self.op = op
+        self.children = children
+
+    def evaluate(self, library, now):
+        if self.op == 'NOT':
+            return ~self.children[0].evaluate(library, now)
+        masks = [child.evaluate(library, now) for child in self.children]
+        return np.logical_and.reduce(masks) if self.op == 'AND' else np.logical_or.reduce(masks)
+
+    def matches(self, library, row, now):
+        if self.op == 'NOT':
+            return not self.children[0].matches(library, row, now)
+        results = (child.matches(library, row, now) for child in self.children)
+        return all(results) if self.op == 'AND' else any(results)
+
+def compileRule(text):
+    # Grammar: expr := term (OR term)*, term := factor (AND factor)*,
+    # factor := NOT factor | ( expr ) | played in N unit | field op value [unit]
+    tokens = re.findall(r'"[^"]*"|\'[^\']*\'|!=|<=|>=|[=<>~()]|[^\s()!=<>~]+', text)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take(expected=None):
+        nonlocal pos
+        token = peek()
+        if token is None or (expected and token.upper() != expected):
+            raise ValueError(f"Expected {expected or 'more input'} in rule")
+        pos += 1
+        return token
+
+    def parseList(op, parse):
+        children = [parse()]
+        while peek() and peek().upper() == op:
+            take()
+            children.append(parse())
+        return children[0] if len(children) == 1 else RuleNode(op, children)
+
+    def parseExpr():
+        return parseList('OR', parseTerm)
+
+    def parseTerm():
+        return parseList('AND', parseFactor)
+
+    def parseFactor():
+        token = take()
+        if token.upper() == 'NOT':
+            return RuleNode('NOT', [parseFactor()])
+        if token == '(':
+            node = parseExpr()
+            take(')')
+            return node
+        if token.lower() == 'played' and peek() and peek().lower() == 'in':
+            take()
+            return RuleCondition('last_played', '<=', take(), take().lower())
+        field = token.lower()
+        op = take()
+        value = take().strip('"\'')
+        unit = None
+        if peek() and peek().lower() in RuleCondition.UNITS:
+            unit = take().lower()
+        return RuleCondition(field, op, value, unit)
+
+    node = parseExpr()
+    if peek() is not None:
+        raise ValueError(f"Unexpected '{peek()}' in rule")
+    return node
+
+class SmartPlaylist:
+    def __init__(self, name, rule):
+        self.name = name
+        self.rule = rule
+        self.query = compileRule(rule)
+        self.members = set()
+
+    def evaluate(self, library):
+        rows = np.flatnonzero(self.query.evaluate(library, time.time()))
+        self.members = set(rows.tolist())
+        return [library.paths[row] for row in rows]
+
+    def update(self, library, row):
+        # Returns +1 if the row joined the playlist, -1 if it left, 0 otherwise
+        matched = self.query.matches(library, row, time.time())
+        if matched and row not in self.members:
+            self.members.add(row)
+            return 1
+        if not matched and row in self.members:
+            self.members.discard(row)
+            return -1
+        return 0
+
+class MetadataScanner(QObject):
+    scanned = pyqtSignal(str, dict)
+
+    def __init__(self, instance, parent=None):
+        super().__init__(parent)
+        self.instance = instance
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def scan(self, path):
+        self.queue.put(path)
+
+    def run(self):
+        while True:
+            path = self.queue.get()
+            if path is None:
+                return
+            try:
+                media = self.instance.media_new(path)
+                media.parse()
+                date = media.get_meta(vlc.Meta.Date) or ''
+                year = re.match(r'\d{4}', date)
+                self.scanned.emit(path, {
+                    'title': media.get_meta(vlc.Meta.Title) or os.path.basename(path),
+                    'artist': media.get_meta(vlc.Meta.Artist),
+                    'album': media.get_meta(vlc.Meta.Album),
+                    'genre': media.get_meta(vlc.Meta.Genre),
+                    'year': int(year.group()) if year else None,
+                    'duration': max(media.get_duration(), 0)
+                })
+                media.release()
+            except Exception as e:
+                print(f"Warning: Could not read metadata for {path}: {str(e)}")
+
+    def close(self):
+        self.queue.put(None)
+
+def transcodeMedia(source, sout, start=None, stop=None, progress=None, cancel=None):
+    # Runs a libvlc stream output job to completion; returns True on success
+    instance = vlc.Instance('--quiet', '--no-video-title-show')
+    media = instance.media_new(source)
+    media.add_option(f":sout={sout}")
+    if start is not None:
+        media.add_option(f":start-time={start / 1000.0:.3f}")
+    if stop is not None:
+        media.add_option(f":stop-time={stop / 1000.0:.3f}")
+    player = instance.media_player_new()
+    player.set_media(media)
+    try:
+        if player.play() == -1:
+            return False
+        while True:
+            state = player.get_state()
+            if state in (vlc.State.Ended, vlc.State.Error, vlc.State.Stopped):
+                return state == vlc.State.Ended
+            if cancel is not None and cancel.is_set():
+                return False
+            if progress:
+                position = player.get_time()
+                begin = start or 0
+                end = stop if stop is not None else player.get_length()
+                if end > begin and position >= 0:
+                    progress(min(max((position - begin) / (end - begin), 0.0), 1.0))
+            time.sleep(0.2)
+    finally:
+        player.stop()
+        player.release()
+        media.release()
+        instance.release()
+
+def runExportJob(job_id, source, destination, profile_name, start, stop, results, cancel):
+    # Entry point of an export worker process; setting cancel makes it stop and exit
+    try:
+        if hasattr(os, 'nice'):
+            os.nice(10)
+        sout = EXPORT_PROFILES[ExportProfile[profile_name]][1] % (
+            destination.replace('\\', '\\\\').replace('"', '\\"'))
+        ok = transcodeMedia(source, sout, start, stop,
+                            lambda fraction: results.put((job_id, 'progress', fraction)), cancel)
+        if cancel.is_set():
+            results.put((job_id, 'cancelled', None))
+        else:
+            results.put((job_id, 'done' if ok else 'error', None))
+    except Exception as e:
+        results.put((job_id, 'error', str(e)))
+
+def decodeAudioBlocks(source, rate, start=None, stop=None, block_seconds=60):
+    # Decodes to mono float32 through a temporary WAV written by libvlc,
+    # yielding blocks so long files never sit in memory as a whole
+    fd, wav_path = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        sout = ('#transcode{vcodec=none,scodec=none,acodec=s16l,channels=1,samplerate=%d}'
+                ':std{access=file,mux=wav,dst="%s"}' % (rate, wav_path.replace('\\', '\\\\')))
+        if not transcodeMedia(source, sout, start, stop):
+            raise RuntimeError(f"Could not decode {source}")
+        with wave.open(wav_path, 'rb') as f:
+            while True:
+                data = np.frombuffer(f.readframes(rate * block_seconds), dtype='<i2')
+                if len(data) == 0:
+                    break
+                yield data.astype(np.float32) / 32768
+    finally:
+        os.remove(wav_path)
+
+def decodeAudio(source, rate, start=None, stop=None):
+    blocks = list(decodeAudioBlocks(source, rate, start, stop))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+def onsetEnvelope(samples, rate, n_fft=1024, hop=256, block=2048):
+    # Spectral flux of the log-compressed magnitude spectrum, in blocks of frames
+    window = np.hanning(n_fft).astype(np.float32)
+    # Centre frame i on sample i * hop
+    samples = np.pad(samples, n_fft // 2)
+    frames = sliding_window_view(samples, n_fft)[::hop]
+    flux = np.zeros(len(frames), dtype=np.float32)
+    for start in range(0, len(frames), block):
+        # Overlap one frame with the previous block so every frame has a predecessor
+        chunk = frames[max(start - 1, 0):start + block]
+        spectrum = np.log1p(1000.0 * np.abs(np.fft.rfft(chunk * window, axis=1)))
+        diff = np.maximum(np.diff(spectrum, axis=0), 0).sum(axis=1)
+        first = max(start, 1)
+        flux[first:first + len(diff)] = diff
+    # Remove the slowly varying loudness so only onsets remain
+    width = max(int(rate / hop), 1)
+    local_mean = np.convolve(flux, np.ones(width) / width, mode='same')
+    return np.maximum(flux - local_mean, 0), rate / hop
+
+def estimateTempo(samples, rate, min_bpm=60, max_bpm=200):
+    # Returns (bpm, beat times in seconds) from an autocorrelated onset envelope
+    envelope, fps = onsetEnvelope(samples, rate)
+    n = len(envelope)
+    if n < 4 * fps:
+        return 0.0, np.zeros(0)
+    centered = envelope - envelope.mean()
+    size = 1 << int(2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(centered, size)
+    autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum), size)[:n]
+
+    lags = np.arange(int(fps * 60 / max_bpm), int(fps * 60 / min_bpm) + 1)
+    bpms = 60 * fps / lags
+    # Log-normal prior around 120 BPM to resolve octave ambiguity
+    weights = np.exp(-0.5 * np.log2(bpms / 120) ** 2)
+    best = int(np.argmax(autocorrelation[lags] * weights))
+    lag = float(lags[best])
+    if 0 < best < len(lags) - 1:
+        a, b, c = autocorrelation[lags[best - 1:best + 2]]
+        denominator = a - 2 * b + c
+        if denominator:
+            lag += 0.5 * (a - c) / denominator
+
+    # Fit the beat comb: search a fine grid of periods around the peak lag and
+    # every phase, scoring the (lightly smoothed) envelope under each comb
+    smoothed = np.convolve(envelope, [0.25, 0.5, 0.25], mode='same')
+    periods = lag * (1 + np.linspace(-0.02, 0.02, 81))
+    phases = np.arange(int(np.ceil(lag)))
+    offsets = np.arange(int(n / periods.min()) + 1)[None, :] * periods[:, None]
+    scores = np.zeros((len(phases), len(periods)))
+    # One phase at a time keeps memory bounded for hour-long files
+    for phase in phases:
+        positions = np.round(phase + offsets).astype(np.intp)
+        valid = positions < n
+        scores[phase] = np.where(valid, smoothed[np.minimum(positions, n - 1)], 0).sum(axis=1) / valid.sum(axis=1)
+    phase, period_index = np.unravel_index(np.argmax(scores), scores.shape)
+    lag = periods[period_index]
+
+    positions = np.round(np.arange(phase, n, lag)).astype(np.intp)
+    radius = max(int(lag * 0.05), 1)
+    windows = sliding_window_view(np.pad(envelope, radius), 2 * radius + 1)[positions]
+    positions = positions + np.argmax(windows, axis=1) - radius
+    return 60 * fps / lag, positions / fps
+
+def analyzeTempo(source):
+    # Entry point of a tempo analysis worker process
+    rate = 11025
+    bpm, beats = estimateTempo(decodeAudio(source, rate), rate)
+    return {'bpm': np.float32(bpm), 'beats': np.round(beats * 1000).astype(np.uint32)}
+
+def detectSilence(samples, rate, block_ms=50, threshold_db=-50.0):
+    # Returns (start, end) in ms of the span between leading and trailing silence
+    block = max(int(rate * block_ms / 1000), 1)
+    count = len(samples) // block
+    if count == 0:
+        return 0, None
+    blocks = samples[:count * block].reshape(count, block)
+    rms = np.sqrt(np.mean(np.square(blocks, dtype=np.float64), axis=1))
+    loud = 20 * np.log10(rms + 1e-10) > threshold_db
+    if not loud.any():
+        return 0, None
+    first = int(np.argmax(loud))
+    last = count - int(np.argmax(loud[::-1]))
+    return first * block_ms, last * block_ms if last < count else None
+
+# Popcount of every 16-bit value, for comparing fingerprints
+BIT_COUNTS = np.unpackbits(np.arange(65536, dtype='>u2').view(np.uint8)).reshape(-1, 16).sum(axis=1).astype(np.uint8)
+
+def audioFingerprint(samples, rate, fps=8, n_fft=2048):
+    # 16-bit sub-fingerprint per frame from the signs of band energy differences
+    hop = int(rate / fps)
+    if len(samples) < n_fft + hop:
+        return np.zeros(0, dtype=np.uint16)
+    frames = sliding_window_view(samples, n_fft)[::hop]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(n_fft).astype(np.float32), axis=1)) ** 2
+    edges = np.round(np.geomspace(300, 2000, 18) * n_fft / rate).astype(np.intp)
+    energy = np.add.reduceat(spectrum, edges, axis=1)[:, :17]
+    band_diff = energy[:, :-1] - energy[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    return np.packbits(bits, axis=1, bitorder='little').view('<u2').ravel()
+
+def findCommonSegment(a, b, fps=8, min_seconds=15, max_errors=3):
+    # Longest aligned run of near-identical sub-fingerprints, as frame ranges in a and b
+    best = None
+    min_frames = min_seconds * fps
+    for lag in range(-len(b) + min_frames, len(a) - min_frames + 1):
+        start_a = max(lag, 0)
+        start_b = start_a - lag
+        length = min(len(a) - start_a, len(b) - start_b)
+        matches = BIT_COUNTS[a[start_a:start_a + length] ^ b[start_b:start_b + length]] <= max_errors
+        # Tolerate isolated mismatches inside a run
+        matches = np.convolve(matches, np.ones(fps), mode='same') >= fps // 2
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], matches.astype(np.int8), [0]))))
+        if len(edges) == 0:
+            continue
+        runs = edges.reshape(-1, 2)
+        longest = runs[np.argmax(runs[:, 1] - runs[:, 0])]
+        if longest[1] - longest[0] >= min_frames and (best is None or longest[1] - longest[0] > best[1] - best[0]):
+            best = (start_a + longest[0], start_a + longest[1], start_b + longest[0], start_b + longest[1])
+    return best
+
+def analyzeTrim(source, intro_seconds=300, outro_seconds=180):
+    # Entry point of a trim analysis worker process
+    rate = 5512
+    samples = decodeAudio(source, rate)
+    start, end = detectSilence(samples, rate)
+    length = len(samples) * 1000 // rate
+    outro_offset = max(len(samples) - outro_seconds * rate, 0)
+    return {
+        'trim_start': np.uint32(start),
+        'trim_end': np.uint32(end if end is not None else length),
+        'length': np.uint32(length),
+        'intro_fingerprint': audioFingerprint(samples[:intro_seconds * rate], rate),
+        'outro_fingerprint': audioFingerprint(samples[outro_offset:], rate),
+        'outro_offset': np.uint32(outro_offset * 1000 // rate)
+    }
+
+def matchEpisodes(source, intro, other_intro, outro, other_outro, outro_offset):
+    # Entry point of a worker comparing one episode with a sibling episode
+    fps = 8
+    result = {'intro_end': np.int64(-1), 'outro_start': np.int64(-1)}
+    intro_match = findCommonSegment(intro, other_intro, fps)
+    if intro_match is not None:
+        result['intro_end'] = np.int64((intro_match[1] + 1) * 1000 // fps)
+    outro_match = findCommonSegment(outro, other_outro, fps)
+    if outro_match is not None:
+        result['outro_start'] = np.int64(outro_offset + outro_match[0] * 1000 // fps)
+    return result
+
+class VideoFrameTap:
+    # Decoded frames are written by VLC straight into preallocated NumPy
+    # buffers; the consumer gets a view of the buffer, never a copy
+    def __init__(self, player, width=160, height=90, buffers=3, on_frame=None):
+        self.frames = np.zeros((buffers, height, width, 4), dtype=np.uint8)
+        self.next = 0
+        self.on_frame = on_frame
+        self.lock_cb = vlc.CallbackDecorators.VideoLockCb(self.lock)
+        self.display_cb = vlc.CallbackDecorators.VideoDisplayCb(self.display)
+        player.video_set_callbacks(self.lock_cb, None, self.display_cb, None)
+        player.video_set_format("RV32", width, height, width * 4)
+
+    def lock(self, opaque, planes):
+        index = self.next
+        self.next = (index + 1) % len(self.frames)
+        planes[0] = self.frames[index].ctypes.data
+        # Picture ids start at 1 so none of them is a null pointer
+        return index + 1
+
+    def display(self, opaque, picture):
+        if self.on_frame:
+            self.on_frame(self.frames[picture - 1])
+
+def sceneCuts(times, differences, min_gap=1000, window=25, sensitivity=6.0, floor=0.25):
+    # Cuts are frames whose histogram change stands out from the local median by
+    # `sensitivity` median absolute deviations and exceeds an absolute floor
+    if len(differences) == 0:
+        return np.zeros(1, dtype=np.uint32)
+    padded = np.pad(differences, window, mode='edge')
+    local = sliding_window_view(padded, 2 * window + 1)
+    median = np.median(local, axis=1)
+    deviation = np.median(np.abs(local - median[:, None]), axis=1)
+    candidates = np.flatnonzero((differences > median + sensitivity * deviation + 1e-3) & (differences > floor))
+    cuts = [0]
+    for i in candidates:
+        if times[i] - cuts[-1] >= min_gap:
+            cuts.append(int(times[i]))
+    return np.array(cuts, dtype=np.uint32)
+
+def analyzeScenes(source, rate=8.0):
+    # Entry point of a scene index worker process
+    instance = vlc.Instance('--quiet', '--no-audio', '--no-video-title-show', '--avcodec-hw=none')
+    player = instance.media_player_new()
+    media = instance.media_new(source)
+    player.set_media(media)
+    times = np.zeros(4096, dtype=np.int64)
+    histograms = np.zeros((4096, 512), dtype=np.float32)
+    count = 0
+    codes = None
+
+    def onFrame(frame):
+        nonlocal times, histograms, count, codes
+        if codes is None:
+            codes = np.zeros(frame.shape[:2], dtype=np.uint16)
+        # 3 bits per channel of the BGRA pixels, 512-bin colour histogram
+        np.right_shift(frame[..., 0], 5, out=codes, casting='unsafe')
+        codes |= (frame[..., 1] >> 5).astype(np.uint16) << 3
+        codes |= (frame[..., 2] >> 5).astype(np.uint16) << 6
+        if count == len(times):
+            times = np.resize(times, 2 * count)
+            histograms = np.resize(histograms, (2 * count, 512))
+        times[count] = player.get_time()
+        histograms[count] = np.bincount(codes.ravel(), minlength=512)
+        count += 1
+
+    tap = VideoFrameTap(player, on_frame=onFrame)
+    try:
+        player.play()
+        # Decode ahead of real time; skipped frames do not hurt histogram cuts
+        player.set_rate(rate)
+        while player.get_state() not in (vlc.State.Ended, vlc.State.Error, vlc.State.Stopped):
+            time.sleep(0.1)
+    finally:
+        player.stop()
+        player.release()
+        media.release()
+        instance.release()
+    pixels = tap.frames.shape[1] * tap.frames.shape[2]
+    differences = 0.5 * np.abs(np.diff(histograms[:count], axis=0)).sum(axis=1) / pixels
+    return {'scenes': sceneCuts(times[1:count], differences)}
+
+def parseSubtitleCues(path):
+    # (start, end) in ms for SubRip/WebVTT and SSA/ASS files
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    cues = []
+    for match in re.finditer(r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{3})', text):
+        h1, m1, s1, ms1, h2, m2, s2, ms2 = (int(v or 0) for v in match.groups())
+        cues.append(((h1 * 60 + m1) * 60000 + s1 * 1000 + ms1, (h2 * 60 + m2) * 60000 + s2 * 1000 + ms2))
+    for match in re.finditer(r'^Dialogue:[^,]*,(\d+):(\d{2}):(\d{2})\.(\d{2}),(\d+):(\d{2}):(\d{2})\.(\d{2}),', text, re.MULTILINE):
+        h1, m1, s1, cs1, h2, m2, s2, cs2 = (int(v) for v in match.groups())
+        cues.append(((h1 * 60 + m1) * 60000 + s1 * 1000 + cs1 * 10, (h2 * 60 + m2) * 60000 + s2 * 1000 + cs2 * 10))
+    return np.array(sorted(cues), dtype=np.int64).reshape(-1, 2)
+
+def detectSpeech(blocks, rate, frame_ms=10):
+    # Per-frame speech flags from log energy, speech-band energy ratio and
+    # spectral flatness, computed on non-overlapping frames block by block
+    frame = int(rate * frame_ms / 1000)
+    frequencies = np.fft.rfftfreq(frame, 1.0 / rate)
+    band = (frequencies >= 100) & (frequencies <= 3400)
+    energy, ratio, flatness = [], [], []
+    remainder = np.zeros(0, dtype=np.float32)
+    for block in blocks:
+        block = np.concatenate((remainder, block))
+        count = len(block) // frame
+        remainder = block[count * frame:]
+        power = np.abs(np.fft.rfft(block[:count * frame].reshape(count, frame), axis=1)) ** 2 + 1e-12
+        total = power.sum(axis=1)
+        energy.append(10 * np.log10(total))
+        ratio.append(power[:, band].sum(axis=1) / total)
+        flatness.append(np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1))
+    if not energy:
+        return np.zeros(0, dtype=bool)
+    energy = np.concatenate(energy)
+    ratio = np.concatenate(ratio)
+    flatness = np.concatenate(flatness)
+    # Adaptive threshold: well above the noise floor of this recording
+    floor = np.percentile(energy, 10)
+    speech = (energy > floor + 12) & (ratio > 0.5) & (flatness < 0.3)
+    # Majority vote over 200 ms fills the gaps between syllables
+    width = max(200 // frame_ms, 1)
+    return np.convolve(speech.astype(np.float32), np.ones(width) / width, mode='same') > 0.5
+
+def cueTimeline(cues, frames, frame_ms=10):
+    # Binary timeline with 1 while a cue is on screen, built with a difference array
+    marks = np.zeros(frames + 1, dtype=np.int32)
+    starts = np.clip(cues[:, 0] // frame_ms, 0, frames)
+    ends = np.clip(cues[:, 1] // frame_ms, 0, frames)
+    np.add.at(marks, starts, 1)
+    np.add.at(marks, ends, -1)
+    return np.cumsum(marks[:-1]) > 0
+
+def bestOffset(speech, subtitles, max_lag):
+    # FFT cross-correlation; a positive lag means speech comes after the cues
+    a = speech - speech.mean()
+    b = subtitles - subtitles.mean()
+    size = 1 << int(len(a) + len(b) - 1).bit_length()
+    correlation = np.fft.irfft(np.fft.rfft(a, size) * np.conj(np.fft.rfft(b, size)), size)
+    lags = np.concatenate((np.arange(0, max_lag + 1), np.arange(-max_lag, 0)))
+    scores = correlation[lags % size]
+    best = int(np.argmax(scores))
+    norm = np.sqrt((a * a).sum() * (b * b).sum()) or 1.0
+    return int(lags[best]), float(scores[best] / norm)
+
+def analyzeSubtitleSync(source, subtitle_path, max_offset=60000, segments=8):
+    # Entry point of a subtitle sync worker process
+    frame_ms = 10
+    speech = detectSpeech(decodeAudioBlocks(source, 8000), 8000, frame_ms).astype(np.float32)
+    cues = parseSubtitleCues(subtitle_path)
+    if len(speech) == 0 or len(cues) == 0:
+        return {'offset': np.int64(0), 'drift': np.float64(0), 'confidence': np.float64(0)}
+    subtitles = cueTimeline(cues, len(speech), frame_ms).astype(np.float32)
+    lag, confidence = bestOffset(speech, subtitles, max_offset // frame_ms)
+
+    # Local offsets per segment around the global one; their slope is the drift
+    shifted = np.roll(subtitles, lag)
+    length = len(speech) // segments
+    centres, offsets, weights = [], [], []
+    for i in range(segments):
+        part = slice(i * length, (i + 1) * length)
+        if shifted[part].sum() < 100:
+            continue
+        local, score = bestOffset(speech[part], shifted[part], 5000 // frame_ms)
+        centres.append((i + 0.5) * length * frame_ms)
+        offsets.append((lag + local) * frame_ms)
+        weights.append(max(score, 1e-3))
+    drift = 0.0
+    offset = lag * frame_ms
+    if len(centres) >= 3:
+        drift, intercept = np.polyfit(centres, offsets, 1, w=weights)
+        # The delay is constant in VLC, so use the fit at the middle of the file
+        offset = int(round(intercept + drift * len(speech) * frame_ms / 2))
+    return {'offset': np.int64(offset), 'drift': np.float64(drift), 'confidence': np.float64(confidence)}
+
+class AnalysisCache:
+    # One small .npz per track and analysis kind, invalidated when the file changes
+    def __init__(self, directory='analysis_cache'):
+        self.directory = directory
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            print(f"Warning: Could not create analysis cache: {str(e)}")
+
+    def filename(self, source, kind):
+        key = hashlib.sha1(source.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{key}.{kind}.npz")
+
+    def signature(self, source):
+        try:
+            stat = os.stat(source)
+            return np.array([stat.st_size, stat.st_mtime], dtype=np.float64)
+        except OSError:
+            return np.zeros(2)
+
+    def load(self, source, kind):
+        path = self.filename(source, kind)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if not np.array_equal(data['signature'], self.signature(source)):
+                    return None
+                return {name: data[name] for name in data.files if name != 'signature'}
+        except Exception as e:
+            print(f"Warning: Could not read analysis cache: {str(e)}")
+            return None
+
+    def save(self, source, kind, result):
+        try:
+            np.savez(self.filename(source, kind), signature=self.signature(source), **result)
+        except Exception as e:
+            print(f"Warning: Could not write analysis cache: {str(e)}")
+
+class AnalysisQueue(QObject):
+    finished = pyqtSignal(str, str, object)
+    failed = pyqtSignal(str, str, str)
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.executor = None
+        self.pending = {}
+        self.closed = False
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def call(self, function, *args):
+        # Runs on the queue's thread, for cache lookups that lead to further submits
+        self.requests.put((None, None, function, args))
+
+    def submit(self, kind, source, function, *args):
+        # Cache probing and worker startup happen on the queue's thread, so
+        # submitting a whole library never blocks the GUI
+        with self.lock:
+            if (kind, source) in self.pending:
+                return
+            self.pending[(kind, source)] = None
+        self.requests.put((kind, source, function, args))
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            kind, source, function, args = request
+            if kind is None:
+                try:
+                    function(*args)
+                except Exception as e:
+                    print(f"Warning: Analysis queue task failed: {str(e)}")
+                continue
+            # Cached results are delivered without a worker; signals are queued to the GUI thread
+            result = self.cache.load(source, kind)
+            if result is not None:
+                with self.lock:
+                    self.pending.pop((kind, source), None)
+                self.finished.emit(kind, source, result)
+                continue
+            try:
+                with self.lock:
+                    if self.closed:
+                        return
+                    if self.executor is None:
+                        self.executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+                    future = self.executor.submit(function, source, *args)
+                    self.pending[(kind, source)] = future
+                # Runs on the executor's thread once the worker is done
+                future.add_done_callback(lambda f, k=kind, p=source: self.done(k, p, f))
+            except Exception as e:
+                with self.lock:
+                    self.pending.pop((kind, source), None)
+                print(f"Warning: Could not start {kind} analysis for {source}: {str(e)}")
+                self.failed.emit(kind, source, str(e))
+
+    def done(self, kind, source, future):
+        with self.lock:
+            self.pending.pop((kind, source), None)
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Warning: {kind} analysis failed for {source}: {str(e)}")
+            self.failed.emit(kind, source, str(e))
+            return
+        self.cache.save(source, kind, result)
+        self.finished.emit(kind, source, result)
+
+    def close(self):
+        self.requests.put(None)
+        with self.lock:
+            self.closed = True
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+
+class ExportJob:
+    def __init__(self, job_id, source, destination, profile, start=None, stop=None):
+        self.job_id = job_id
+        self.source = source
+        self.destination = destination
+        self.profile = profile
+        self.start = start
+        self.stop = stop
+        self.progress = 0.0
+        self.status = 'queued'
+        self.process = None
+        self.cancel_event = None
+        self.deadline = None
+
+    def describe(self):
+        if self.status == 'running':
+            state = f"{int(self.progress * 100)}%"
+        else:
+            state = self.status
+        return f"{os.path.basename(self.destination)} [{self.profile.name}] - {state}"
+
+class ExportQueue(QObject):
+    jobChanged = pyqtSignal(object)
+
+    def __init__(self, workers=None, parent=None):
+        super().__init__(parent)
+        self.workers = workers or os.cpu_count() or 2
+        self.jobs = []
+        self.next_id = 0
+        # Spawned workers do not inherit the Qt and VLC threads of the GUI process
+        self.context = multiprocessing.get_context('spawn')
+        self.results = self.context.Queue()
+        self.timer = QTimer(self)
+        self.timer.setInterval(200)
+        self.timer.timeout.connect(self.poll)
+
+    def add(self, source, destination, profile, start=None, stop=None):
+        job = ExportJob(self.next_id, source, destination, profile, start, stop)
+        self.next_id += 1
+        self.jobs.append(job)
+        self.jobChanged.emit(job)
+        self.schedule()
+        return job
+
+    def schedule(self):
+        # A cancelling worker still holds its slot until it has exited
+        running = sum(1 for job in self.jobs if job.status in ('running', 'cancelling'))
+        for job in self.jobs:
+            if running >= self.workers:
+                break
+            if job.status == 'queued':
+                job.cancel_event = self.context.Event()
+                job.process = self.context.Process(
+                    target=runExportJob, daemon=True,
+                    args=(job.job_id, job.source, job.destination, job.profile.name,
+                          job.start, job.stop, self.results, job.cancel_event))
+                job.process.start()
+                job.status = 'running'
+                running += 1
+                self.jobChanged.emit(job)
+        if running and not self.timer.isActive():
+            self.timer.start()
+        elif not running:
+            self.timer.stop()
+
+    def job(self, job_id):
+        for job in self.jobs:
+            if job.job_id == job_id:
+                return job
+        return None
+
+    def poll(self):
+        while True:
+            try:
+                job_id, kind, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            job = self.job(job_id)
+            # Cancelling jobs are finished below once their worker has exited
+            if job is None or job.status != 'running':
+                continue
+            if kind == 'progress':
+                job.progress = value
+            else:
+                job.status = kind if value is None else f"error: {value}"
+                job.progress = 1.0 if kind == 'done' else job.progress
+                job.process.join(timeout=1)
+            self.jobChanged.emit(job)
+        # Workers that crashed without reporting back
+        for job in self.jobs:
+            if job.status == 'running' and job.process.exitcode not in (None, 0):
+                job.status = f"error: worker exited with code {job.process.exitcode}"
+                self.jobChanged.emit(job)
+            elif job.status == 'cancelling':
+                self.finishCancel(job)
+        self.schedule()
+
+    def finishCancel(self, job):
+        # Killing a worker while it writes to the shared results queue can corrupt the
+        # queue, so it gets until the deadline to stop on its own
+        if job.process.exitcode is None:
+            if time.time() >= job.deadline:
+                job.process.terminate()
+                job.deadline = time.time() + 3
+            return
+        job.process.join()
+        try:
+            if os.path.exists(job.destination):
+                os.remove(job.destination)
+        except OSError as e:
+            print(f"Warning: Could not remove partial export: {str(e)}")
+        job.status = 'cancelled'
+        self.jobChanged.emit(job)
+
+    def cancel(self, job):
+        if job.status == 'running':
+            job.cancel_event.set()
+            job.status = 'cancelling'
+            job.deadline = time.time() + 3
+            self.jobChanged.emit(job)
+        elif job.status == 'queued':
+            job.status = 'cancelled'
+            self.jobChanged.emit(job)
+        self.schedule()
+
+    def cancelAll(self):
+        for job in self.jobs:
+            self.cancel(job)
+
+    def close(self, timeout=5):
+        # On exit wait a bounded time for cancelled workers so partial files are removed
+        self.cancelAll()
+        self.timer.stop()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            cancelling = [job for job in self.jobs if job.status == 'cancelling']
+            if not cancelling:
+                break
+            for job in cancelling:
+                self.finishCancel(job)
+            time.sleep(0.05)
+
+    def clearFinished(self):
+        self.jobs = [job for job in self.jobs if job.status in ('queued', 'running', 'cancelling')]
+
+class MediaCache:
+    NETWORK_SCHEMES = ('http', 'https', 'ftp')
+    # Shares urllib cannot open; libvlc dumps the raw input stream instead
+    VLC_SCHEMES = ('smb', 'nfs')
+    NETWORK_FILESYSTEMS = ('nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', 'afpfs', 'davfs', '9p')
+    CHUNK_SIZE = 64 * 1024
+    # Only files the cache created itself are ever cleaned up
+    CACHE_FILE = re.compile(r'[0-9a-f]{40}(\.\w{1,7})?(\.part)?$|index\.json\.tmp$')
+
+    def __init__(self, directory='media_cache', max_bytes=2 * 1024 ** 3, bandwidth=0):
+        # Relative to the working directory like the other stores; cleanup only ever
+        # touches names matching CACHE_FILE, so a shared directory is safe
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Read-ahead limit in bytes per second, 0 for unlimited
+        self.bandwidth = bandwidth
+        # key -> (filename, size, signature), least recently used first
+        self.entries = OrderedDict()
+        self.pinned = None
+        self.pending = set()
+        self.counters = {'hits': 0, 'misses': 0, 'bytes_served': 0, 'bytes_fetched': 0,
+                         'evictions': 0, 'errors': 0}
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.mounts = self.networkMounts()
+        self.loadIndex()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def networkMounts(cls):
+        mounts = []
+        try:
+            if os.path.exists('/proc/mounts'):
+                with open('/proc/mounts', 'r') as f:
+                    for line in f:
+                        fields = line.split()
+                        if len(fields) > 2 and fields[2] in cls.NETWORK_FILESYSTEMS:
+                            mounts.append(fields[1].replace('\\040', ' ').rstrip('/') + '/')
+        except OSError as e:
+            print(f"Warning: Could not read mount table: {str(e)}")
+        return mounts
+
+    def isCacheable(self, source):
+        scheme = urllib.parse.urlparse(source).scheme.lower()
+        if scheme in self.NETWORK_SCHEMES + self.VLC_SCHEMES:
+            return True
+        if len(scheme) > 1:
+            return False
+        # UNC shares and files on network mounts
+        if source.startswith('\\\\') or source.startswith('//'):
+            return True
+        path = os.path.abspath(source)
+        return any(path.startswith(mount) for mount in self.mounts)
+
+    def key(self, source):
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    def signature(self, source):
+        # Size and mtime of file sources, so changes on the share invalidate the copy
+        if urllib.parse.urlparse(source).scheme.lower() in self.NETWORK_SCHEMES + self.VLC_SCHEMES:
+            return None
+        stat = os.stat(source)
+        return [stat.st_size, stat.st_mtime]
+
+    def resolve(self, source):
+        # Returns the local copy when present, otherwise the source itself
+        if not self.isCacheable(source):
+            return source
+        key = self.key(source)
+        try:
+            signature = self.signature(source)
+        except OSError:
+            signature = None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                filename, size, cached_signature = entry
+                path = os.path.join(self.directory, filename)
+                if os.path.exists(path) and (signature is None or signature == cached_signature):
+                    self.entries.move_to_end(key)
+                    self.pinned = key
+                    self.counters['hits'] += 1
+                    self.counters['bytes_served'] += size
+                    return path
+                self.removeEntry(key)
+            self.counters['misses'] += 1
+        self.prefetch([source])
+        return source
+
+    def prefetch(self, sources):
+        for source in sources:
+            if not self.isCacheable(source):
+                continue
+            key = self.key(source)
+            with self.lock:
+                if key in self.entries or key in self.pending:
+                    continue
+                self.pending.add(key)
+            self.queue.put(source)
+
+    def run(self):
+        while True:
+            source = self.queue.get()
+            if source is None:
+                return
+            try:
+                self.fetch(source)
+            except Exception as e:
+                self.counters['errors'] += 1
+                print(f"Warning: Could not cache {source}: {str(e)}")
+            finally:
+                with self.lock:
+                    self.pending.discard(self.key(source))
+
+    def fetch(self, source):
+        key = self.key(source)
+        parsed = urllib.parse.urlparse(source)
+        scheme = parsed.scheme.lower()
+        extension = os.path.splitext(parsed.path if scheme in self.NETWORK_SCHEMES + self.VLC_SCHEMES
+                                     else source)[1][:8]
+        filename = key + extension
+        part_path = os.path.join(self.directory, filename + '.part')
+        signature = self.signature(source)
+        if scheme in self.VLC_SCHEMES:
+            size = self.dump(source, part_path)
+            self.store(key, filename, part_path, size, signature)
+            return
+        if scheme in self.NETWORK_SCHEMES:
+            stream = urllib.request.urlopen(source, timeout=30)
+        else:
+            stream = open(source, 'rb')
+        size = 0
+        start = time.monotonic()
+        try:
+            with stream, open(part_path, 'wb') as f:
+                while True:
+                    chunk = stream.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ValueError("file is larger than the cache")
+                    if self.bandwidth:
+                        delay = size / self.bandwidth - (time.monotonic() - start)
+                        if delay > 0:
+                            time.sleep(delay)
+        except Exception:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        self.store(key, filename, part_path, size, signature)
+
+    def dump(self, source, part_path):
+        # The demux dump module copies the input byte for byte; the bandwidth limit does not apply
+        instance = vlc.Instance('--quiet', '--no-video', '--aout=dummy')
+        media = instance.media_new(source)
+        media.add_option(':demux=dump')
+        media.add_option(f":demuxdump-file={part_path}")
+        player = instance.media_player_new()
+        player.set_media(media)
+        try:
+            if player.play() == -1:
+                raise IOError("could not open the share")
+            while True:
+                state = player.get_state()
+                if state in (vlc.State.Ended, vlc.State.Error, vlc.State.Stopped):
+                    break
+                if os.path.exists(part_path) and os.path.getsize(part_path) > self.max_bytes:
+                    raise ValueError("file is larger than the cache")
+                time.sleep(0.2)
+            if state != vlc.State.Ended or not os.path.exists(part_path):
+                raise IOError("could not read the share")
+            return os.path.getsize(part_path)
+        except Exception:
+            player.stop()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        finally:
+            player.stop()
+            player.release()
+            media.release()
+            instance.release()
+
+    def store(self, key, filename, part_path, size, signature):
+        with self.lock:
+            self.evict(size)
+            os.replace(part_path, os.path.join(self.directory, filename))
+            self.entries[key] = (filename, size, signature)
+            self.counters['bytes_fetched'] += size
+            self.saveIndex()
+
+    def usedBytes(self):
+        return sum(entry[1] for entry in self.entries.values())
+
+    def evict(self, needed=0):
+        # Drop least recently used entries until `needed` more bytes fit
+        used = self.usedBytes()
+        for key in list(self.entries):
+            if used + needed <= self.max_bytes:
+                break
+            if key == self.pinned:
+                continue
+            used -= self.entries[key][1]
+            self.removeEntry(key)
+            self.counters['evictions'] += 1
+
+    def removeEntry(self, key):
+        filename = self.entries.pop(key)[0]
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except OSError as e:
+            print(f"Warning: Could not remove cached file: {str(e)}")
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self.entries)
+            stats['used_bytes'] = self.usedBytes()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def loadIndex(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            index_path = os.path.join(self.directory, 'index.json')
+            if os.path.exists(index_path):
+                with open(index_path, 'r') as f:
+                    for key, filename, size, signature in json.load(f):
+                        if os.path.exists(os.path.join(self.directory, filename)):
+                            self.entries[key] = (filename, size, signature)
+            # Remove leftovers from interrupted downloads or a lost index
+            known = {entry[0] for entry in self.entries.values()}
+            for filename in os.listdir(self.directory):
+                if filename not in known and self.CACHE_FILE.match(filename):
+                    os.remove(os.path.join(self.directory, filename))
+        except Exception as e:
+            print(f"Error loading media cache index: {str(e)}")
+
+    def saveIndex(self):
+        try:
+            index_path = os.path.join(self.directory, 'index.json')
+            with open(index_path + '.tmp', 'w') as f:
+                json.dump([[key] + list(entry) for key, entry in self.entries.items()], f)
+            os.replace(index_path + '.tmp', index_path)
+        except Exception as e:
+            print(f"Warning: Could not save media cache index: {str(e)}")
+
+    def close(self):
+        self.queue.put(None)
+
+class MediaPool:
+    # libvlc does not report what a parsed media costs; entries are estimated
+    ENTRY_BYTES = 256 * 1024
+    TRACK_BYTES = 4 * 1024
+
+    def __init__(self, max_entries=32, max_bytes=32 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> entry dict, least recently used first
+        self.entries = OrderedDict()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'parses': 0}
+        self.parse_seconds = 0.0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.counters['misses'] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.counters['hits'] += 1
+        return entry
+
+    def add(self, key, media, parse_seconds):
+        self.discard(key)
+        self.counters['parses'] += 1
+        self.parse_seconds += parse_seconds
+        tracks = []
+        subtitles = []
+        for track in media.tracks_get() or []:
+            tracks.append((track.type.value, track.codec, track.id))
+            if track.type == vlc.TrackType.ext:
+                # Named the way the player's own SPU descriptions are
+                name = track.description or f"Track {len(subtitles) + 1}".encode()
+                if track.language:
+                    name += b" - [" + track.language + b"]"
+                subtitles.append((track.id, name))
+        # Without parsed streams, subtitles are left for the player to report during playback
+        entry = {'media': media, 'tracks': tracks, 'duration': media.get_duration(),
+                 'subtitles': subtitles if tracks else None}
+        entry['size'] = (self.ENTRY_BYTES + self.TRACK_BYTES * len(tracks) +
+                         sum(len(name) + 16 for _, name in subtitles))
+        self.entries[key] = entry
+        self.evict()
+        return entry
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            # Players keep their own reference to media they are playing
+            entry['media'].release()
+
+    def usedBytes(self):
+        return sum(entry['size'] for entry in self.entries.values())
+
+    def evict(self):
+        # The most recently used entry always stays
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or
+                                         self.usedBytes() > self.max_bytes):
+            key = next(iter(self.entries))
+            self.discard(key)
+            self.counters['evictions'] += 1
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['entries'] = len(self.entries)
+        stats['used_bytes'] = self.usedBytes()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['parse_time'] = self.parse_seconds / stats['parses'] if stats['parses'] else 0.0
+        # Every hit skips one parse, which also yields the subtitle descriptions
+        stats['time_saved'] = stats['hits'] * stats['parse_time']
+        return stats
+
+    def clear(self):
+        for key in list(self.entries):
+            self.discard(key)
+
+class PcmRingBuffer:
+    # Single-producer ring: only the writer moves write_pos, readers keep their
+    # own cursors, so the VLC audio thread never waits on a lock
+    def __init__(self, frames, channels):
+        self.frames = frames
+        self.buffer = np.zeros((frames, channels), dtype=np.float32)
+        self.write_pos = 0
+
+    def write(self, samples, scale=1.0):
+        n = len(samples)
+        if n > self.frames:
+            samples = samples[-self.frames:]
+            n = self.frames
+        start = self.write_pos % self.frames
+        first = min(n, self.frames - start)
+        np.multiply(samples[:first], scale, out=self.buffer[start:start + first])
+        np.multiply(samples[first:], scale, out=self.buffer[:n - first])
+        # Publish only after the frames are in place
+        self.write_pos += n
+
+    def read(self, out, pos):
+        # Copies frames from `pos` into `out`; returns the new cursor and frame count
+        write_pos = self.write_pos
+        pos = max(pos, write_pos - self.frames)
+        n = min(write_pos - pos, len(out))
+        start = pos % self.frames
+        first = min(n, self.frames - start)
+        out[:first] = self.buffer[start:start + first]
+        out[first:n] = self.buffer[:n - first]
+        return pos + n, n
+
+class AudioTap:
+    RATE = 44100
+    CHANNELS = 2
+    MAX_DRIFT_MS = 250
+
+    def __init__(self, player):
+        # The audible player keeps VLC's own audio output; a silent, audio-only
+        # twin decodes the same media into the ring for analysis
+        self.player = player
+        self.ring = PcmRingBuffer(self.RATE * 2, self.CHANNELS)
+        self.timing = None
+        self.mrl = None
+        self.shadow = player.get_instance().media_player_new()
+        # ctypes callbacks must outlive the player's use of them
+        self.play_cb = vlc.CallbackDecorators.AudioPlayCb(self.play)
+        self.flush_cb = vlc.CallbackDecorators.AudioFlushCb(self.flush)
+        self.shadow.audio_set_callbacks(self.play_cb, None, None, self.flush_cb, None, None)
+        self.shadow.audio_set_format("S16N", self.RATE, self.CHANNELS)
+
+    def play(self, data, samples, count, pts):
+        # VLC audio thread: view the S16 samples in place and convert into the ring
+        pcm = np.ctypeslib.as_array(ctypes.cast(samples, ctypes.POINTER(ctypes.c_int16)),
+                                    shape=(count, self.CHANNELS))
+        self.ring.write(pcm, 1.0 / 32768)
+        # Ring position and libvlc clock time at which this block ends
+        self.timing = (self.ring.write_pos, pts + count * 1000000 // self.RATE)
+
+    def flush(self, data, pts):
+        self.timing = None
+
+    def latest(self, out):
+        # Window ending at the sample due now; callbacks run ahead of their pts
+        end = self.ring.write_pos
+        timing = self.timing
+        if timing is not None:
+            position, end_pts = timing
+            lead = (end_pts - vlc.libvlc_clock()) * self.RATE // 1000000
+            end = position - min(max(lead, 0), self.ring.frames - len(out))
+        self.ring.read(out, end - len(out))
+
+    def sync(self, active):
+        # Mirror media, state, rate and position of the audible player
+        try:
+            media = self.player.get_media() if active else None
+            mrl = media.get_mrl() if media is not None else None
+            if mrl != self.mrl:
+                self.shadow.stop()
+                self.timing = None
+                self.mrl = mrl
+                if mrl is not None:
+                    shadow_media = self.player.get_instance().media_new(mrl)
+                    shadow_media.add_option(':no-video')
+                    self.shadow.set_media(shadow_media)
+                    shadow_media.release()
+            if self.mrl is None:
+                return
+            state = self.player.get_state()
+            if state == vlc.State.Playing:
+                if not self.shadow.is_playing():
+                    self.shadow.play()
+                    return
+                if self.shadow.get_rate() != self.player.get_rate():
+                    self.shadow.set_rate(self.player.get_rate())
+                if abs(self.shadow.get_time() - self.player.get_time()) > self.MAX_DRIFT_MS:
+                    self.shadow.set_time(self.player.get_time())
+            elif state == vlc.State.Paused:
+                self.shadow.set_pause(1)
+            else:
+                self.shadow.stop()
+        except Exception as e:
+            print(f"Warning: Could not sync audio analysis: {str(e)}")
+
+    def close(self):
+        self.shadow.stop()
+        self.shadow.release()
+
+class SpectrumWidget(QWidget):
+    FFT_SIZE = 2048
+    BANDS = 48
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(120)
+        self.tap = None
+        # Every buffer used per frame is allocated here; np.fft.rfft's result is the only per-frame allocation
+        self.frames = np.zeros((self.FFT_SIZE, AudioTap.CHANNELS), dtype=np.float32)
+        self.mono = np.zeros(self.FFT_SIZE, dtype=np.float32)
+        self.window = np.hanning(self.FFT_SIZE).astype(np.float32)
+        self.magnitude = np.zeros(self.FFT_SIZE // 2 + 1, dtype=np.float32)
+        self.squares = np.zeros_like(self.frames)
+        self.rms = np.zeros(AudioTap.CHANNELS, dtype=np.float32)
+        self.peaks = np.zeros(AudioTap.CHANNELS, dtype=np.float32)
+
+        # Log-spaced band edges from 30 Hz to 16 kHz, as FFT bin indices
+        edges = np.geomspace(30, 16000, self.BANDS + 1) * self.FFT_SIZE / AudioTap.RATE
+        self.edges = np.unique(np.clip(np.round(edges).astype(np.intp), 1, self.FFT_SIZE // 2))[:-1]
+        self.bands = np.zeros(len(self.edges), dtype=np.float32)
+        self.levels = np.zeros(len(self.edges), dtype=np.float32)
+        # Full-scale sine reference for dB conversion
+        self.reference = float(self.window.sum() / 2)
+
+        self.bar_color = QColor("#ffb200")
+        self.meter_color = QColor("#cccccc")
+        self.background = QColor("#1a1a1a")
+        self.timer = QTimer(self)
+        self.timer.setInterval(16)
+        self.timer.timeout.connect(self.tick)
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setInterval(250)
+        self.sync_timer.timeout.connect(self.syncTap)
+
+    def setTap(self, tap):
+        if self.tap is not None and self.tap is not tap:
+            self.tap.sync(False)
+        self.tap = tap
+        if tap is None:
+            self.timer.stop()
+            self.sync_timer.stop()
+            self.levels[:] = 0
+            self.peaks[:] = 0
+            self.update()
+        else:
+            self.syncTap()
+            if not self.timer.isActive():
+                self.timer.start()
+                self.sync_timer.start()
+
+    def syncTap(self):
+        # Nothing is decoded for analysis while the panel is hidden
+        if self.tap is not None:
+            self.tap.sync(self.isVisible())
+
+    def tick(self):
+        if self.tap is None or not self.isVisible():
+            return
+        self.tap.latest(self.frames)
+        np.mean(self.frames, axis=1, out=self.mono)
+        np.multiply(self.mono, self.window, out=self.mono)
+        np.abs(np.fft.rfft(self.mono), out=self.magnitude)
+        np.maximum.reduceat(self.magnitude, self.edges, out=self.bands)
+
+        # Map -60..0 dBFS onto 0..1 and let bars fall back smoothly
+        self.bands *= 1.0 / self.reference
+        np.maximum(self.bands, 1e-6, out=self.bands)
+        np.log10(self.bands, out=self.bands)
+        self.bands *= 20.0 / 60.0
+        self.bands += 1.0
+        np.clip(self.bands, 0.0, 1.0, out=self.bands)
+        self.levels *= 0.85
+        np.maximum(self.levels, self.bands, out=self.levels)
+
+        # VU meters over the last ~46 ms
+        np.square(self.frames, out=self.squares)
+        np.mean(self.squares, axis=0, out=self.rms)
+        np.sqrt(self.rms, out=self.rms)
+        self.peaks *= 0.9
+        np.maximum(self.peaks, self.rms, out=self.peaks)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        width = self.width()
+        height = self.height()
+        painter.fillRect(0, 0, width, height, self.background)
+
+        meter_width = 8
+        bars_width = width - 3 * meter_width - 8
+        count = len(self.levels)
+        bar_width = max(bars_width // count, 1)
+        for i in range(count):
+            bar_height = int(self.levels[i] * (height - 4))
+            painter.fillRect(i * bar_width + 1, height - bar_height, bar_width - 2, bar_height, self.bar_color)
+
+        for channel in range(AudioTap.CHANNELS):
+            level = min(self.peaks[channel] * 1.414, 1.0)
+            meter_height = int(level * (height - 4))
+            x = width - (AudioTap.CHANNELS - channel) * (meter_width + 4)
+            painter.fillRect(x, height - meter_height, meter_width, meter_height, self.meter_color)
+        painter.end()
+
+class VisualizerPanel(QDockWidget):
+    def __init__(self, parent=None):
+        super().__init__("Visualizer", parent)
+        self.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
+
+        container = QWidget()
+        layout = QVBoxLayout(container)
+
+        self.enable_cb = QCheckBox("Enable")
+        self.enable_cb.toggled.connect(parent.setVisualizerEnabled)
+        layout.addWidget(self.enable_cb)
+
+        self.spectrum = SpectrumWidget()
+        layout.addWidget(self.spectrum, stretch=1)
+
+        self.setWidget(container)
+
+class PlaybackTelemetry:
+    # Counters are cumulative per media as reported by libvlc
+    FIELDS = ('time', 'position', 'input_bitrate', 'demux_bitrate', 'read_bytes', 'demux_corrupted',
+              'demux_discontinuity', 'decoded_video', 'decoded_audio', 'displayed_pictures',
+              'lost_pictures', 'played_abuffers', 'lost_abuffers', 'cache', 'stalls')
+
+    def __init__(self, capacity=7200):
+        self.samples = np.zeros(capacity, dtype=[(field, '<f8') for field in self.FIELDS])
+        self.count = 0
+        self.stats = vlc.MediaStats()
+        # Buffer fill per attached player; a crossfade runs two at once
+        self.cache = {}
+        self.stalls = 0
+        self.media = []
+        self.started = time.time()
+
+    def attach(self, player):
+        self.cache[player] = 0.0
+        player.event_manager().event_attach(vlc.EventType.MediaPlayerBuffering, self.buffering, player)
+
+    def buffering(self, event, player):
+        # VLC thread; a drop below 100% after a full buffer is a stall
+        cache = event.u.new_cache
+        if cache < 100.0 and self.cache.get(player, 0.0) >= 100.0 and self.count:
+            self.stalls += 1
+        self.cache[player] = cache
+
+    def markMedia(self, path, player):
+        self.media.append((time.time(), path))
+        self.markSeek(player)
+
+    def markSeek(self, player):
+        # Rebuffering after a new media or a seek is expected, not a stall
+        self.cache[player] = 0.0
+
+    def sample(self, media, player):
+        if not media.get_stats(self.stats):
+            return
+        row = self.samples[self.count % len(self.samples)]
+        row['time'] = time.time()
+        row['position'] = player.get_time()
+        for field in self.FIELDS[2:-2]:
+            row[field] = getattr(self.stats, field)
+        row['cache'] = self.cache.get(player, 0.0)
+        row['stalls'] = self.stalls
+        self.count += 1
+
+    def history(self):
+        # Samples in chronological order
+        capacity = len(self.samples)
+        if self.count <= capacity:
+            return self.samples[:self.count]
+        start = self.count % capacity
+        return np.concatenate((self.samples[start:], self.samples[:start]))
+
+    def perSecond(self, field, count=None):
+        # Rate of a cumulative counter over the last `count` samples; resets at
+        # media changes are clipped to 0
+        history = self.history()
+        if count is not None:
+            history = history[-count:]
+        if len(history) < 2:
+            return np.zeros(0)
+        elapsed = np.maximum(np.diff(history['time']), 1e-3)
+        return np.maximum(np.diff(history[field]), 0) / elapsed
+
+    def session(self, player):
+        width, height = player.video_get_size(0) or (0, 0)
+        return {
+            'started': self.started,
+            'libvlc_version': vlc.libvlc_get_version().decode(errors='replace'),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'python': platform.python_version(),
+            'rate': player.get_rate(),
+            'fps': player.get_fps(),
+            'video_size': [width, height],
+            'media': [{'time': t, 'path': path} for t, path in self.media]
+        }
+
+    def exportCsv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.FIELDS)
+            writer.writerows(self.history().tolist())
+
+    def exportJson(self, path, player):
+        history = self.history()
+        with open(path, 'w') as f:
+            json.dump({'session': self.session(player),
+                       'samples': {field: history[field].tolist() for field in self.FIELDS}}, f)
+
+    def reset(self):
+        self.count = 0
+        self.stalls = 0
+        self.media = self.media[-1:]
+        self.started = time.time()
+
+class TelemetryGraph(QWidget):
+    def __init__(self, telemetry, parent=None):
+        super().__init__(parent)
+        self.telemetry = telemetry
+        self.setMinimumHeight(120)
+        self.line_color = QColor("#ffb200")
+        self.loss_color = QColor("#ff4040")
+        self.grid_color = QColor("#333333")
+        self.background = QColor("#1a1a1a")
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        width = self.width()
+        height = self.height()
+        painter.fillRect(0, 0, width, height, self.background)
+        painter.setPen(self.grid_color)
+        for i in range(1, 4):
+            painter.drawLine(0, height * i // 4, width, height * i // 4)
+
+        # Input bitrate as a line, lost frames and audio buffers as bars
+        history = self.telemetry.history()[-width:]
+        if len(history) >= 2:
+            bitrate = history['input_bitrate']
+            scale = (height - 4) / max(float(bitrate.max()), 1e-6)
+            step = width / (len(history) - 1)
+            painter.setPen(self.line_color)
+            for i in range(1, len(history)):
+                painter.drawLine(int((i - 1) * step), height - 2 - int(bitrate[i - 1] * scale),
+                                 int(i * step), height - 2 - int(bitrate[i] * scale))
+            # Lost frames and audio buffers per second, one bar per sample interval
+            losses = (self.telemetry.perSecond('lost_pictures', len(history)) +
+                      self.telemetry.perSecond('lost_abuffers', len(history)))
+            for i in np.flatnonzero(losses):
+                bar = min(int(np.ceil(losses[i] * 4)), height)
+                painter.fillRect(int((i + 1) * step) - 1, height - bar, 3, bar, self.loss_color)
+        painter.end()
+
+class TelemetryPanel(QDockWidget):
+    def __init__(self, telemetry, parent=None):
+        super().__init__("Playback Health", parent)
+        self.setAllowedAreas(Qt.DockWidgetArea.AllDockWidgetAreas)
+        self.telemetry = telemetry
+
+        container = QWidget()
+        layout = QVBoxLayout(container)
+
+        self.graph = TelemetryGraph(telemetry)
+        layout.addWidget(self.graph, stretch=1)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        buttons_layout = QHBoxLayout()
+        csv_button = QPushButton("Export CSV...")
+        csv_button.clicked.connect(parent.exportTelemetryCsv)
+        json_button = QPushButton("Export JSON...")
+        json_button.clicked.connect(parent.exportTelemetryJson)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        buttons_layout.addWidget(csv_button)
+        buttons_layout.addWidget(json_button)
+        buttons_layout.addWidget(reset_button)
+        layout.addLayout(buttons_layout)
+
+        self.setWidget(container)
+
+    def refresh(self):
+        history = self.telemetry.history()
+        if len(history):
+            last = history[-1]
+            # Loss rates over the last ~5 s of samples
+            lost_frames = self.telemetry.perSecond('lost_pictures', 11)
+            lost_audio = self.telemetry.perSecond('lost_abuffers', 11)
+            # Same kb/s scaling as the VLC statistics dialog
+            self.summary_label.setText(
+                f"Input {last['input_bitrate'] * 8000:.0f} kb/s, "
+                f"lost frames {int(last['lost_pictures'])} "
+                f"({lost_frames.mean() if len(lost_frames) else 0.0:.1f}/s), "
+                f"lost audio buffers {int(last['lost_abuffers'])} "
+                f"({lost_audio.mean() if len(lost_audio) else 0.0:.1f}/s), "
+                f"corrupted {int(last['demux_corrupted'])}, "
+                f"stalls {int(last['stalls'])}, cache {last['cache']:.0f}%")
+        self.graph.update()
+
+    def reset(self):
+        self.telemetry.reset()
+        self.refresh()
+
 class VideoControlPanel(QDockWidget):
     def __init__(self, parent=None):
         super().__init__("Video Controls", parent)
@@ -234,10 +2320,18 @@ class SubtitlePanel(QDockWidget):
         # Delay adjustment
         settings_layout.addWidget(QLabel("Delay (ms):"), 1, 0)
         self.delay_spin = QSpinBox()
-        self.delay_spin.setRange(-10000, 10000)
+        self.delay_spin.setRange(-60000, 60000)
         self.delay_spin.setSingleStep(100)
         self.delay_spin.valueChanged.connect(parent.setSubtitleDelay)
         settings_layout.addWidget(self.delay_spin, 1, 1)
+
+        # Automatic delay from the audio
+        self.sync_button = QPushButton("Auto Sync")
+        self.sync_button.clicked.connect(parent.autoSyncSubtitles)
+        settings_layout.addWidget(self.sync_button, 2, 1)
+        self.sync_label = QLabel("")
+        self.sync_label.setWordWrap(True)
+        settings_layout.addWidget(self.sync_label, 3, 0, 1, 2)
         
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
@@ -245,6 +2339,55 @@ class SubtitlePanel(QDockWidget):
         layout.addStretch()
         self.setWidget(container)
 
+class ExportPanel(QDockWidget):
+    def __init__(self, export_queue, parent=None):
+        super().__init__("Exports", parent)
+        self.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea)
+        self.export_queue = export_queue
+        self.items = {}
+
+        container = QWidget()
+        layout = QVBoxLayout(container)
+
+        self.job_list = QListWidget()
+        layout.addWidget(self.job_list)
+
+        buttons_layout = QHBoxLayout()
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.cancelSelected)
+        cancel_all_button = QPushButton("Cancel All")
+        cancel_all_button.clicked.connect(export_queue.cancelAll)
+        clear_button = QPushButton("Clear Finished")
+        clear_button.clicked.connect(self.clearFinished)
+        buttons_layout.addWidget(cancel_button)
+        buttons_layout.addWidget(cancel_all_button)
+        buttons_layout.addWidget(clear_button)
+        layout.addLayout(buttons_layout)
+
+        export_queue.jobChanged.connect(self.updateJob)
+        self.setWidget(container)
+
+    def updateJob(self, job):
+        item = self.items.get(job.job_id)
+        if item is None:
+            item = QListWidgetItem()
+            item.setData(Qt.ItemDataRole.UserRole, job.job_id)
+            self.job_list.addItem(item)
+            self.items[job.job_id] = item
+        item.setText(job.describe())
+
+    def cancelSelected(self):
+        for item in self.job_list.selectedItems():
+            job = self.export_queue.job(item.data(Qt.ItemDataRole.UserRole))
+            if job:
+                self.export_queue.cancel(job)
+
+    def clearFinished(self):
+        self.export_queue.clearFinished()
+        for job_id in list(self.items):
+            if self.export_queue.job(job_id) is None:
+                self.job_list.takeItem(self.job_list.row(self.items.pop(job_id)))
+
 class MinimalButton(QPushButton):
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
@@ -268,43 +2411,285 @@ class MinimalButton(QPushButton):
             }
         """)
 
-class PlaylistWidget(QListWidget):
-    def __init__(self, parent=None):
+DIGIT_RUN = re.compile(r'\d+')
+
+def naturalSortKey(text):
+    # Zero-padded digit runs compare as numbers ("Track 2" < "Track 10"); the rest by locale collation
+    return locale.strxfrm(DIGIT_RUN.sub(lambda match: match.group().zfill(20), text.casefold()))
+
+def rankKeys(keys):
+    # Float ranks so equal keys tie and empty keys become NaN (sorted last)
+    ranks = np.empty(len(keys))
+    rank = -1
+    previous = None
+    for i in sorted(range(len(keys)), key=keys.__getitem__):
+        if keys[i] != previous:
+            previous = keys[i]
+            rank += 1
+        ranks[i] = rank if previous else np.nan
+    return ranks
+
+class PlaylistModel(QAbstractTableModel):
+    COLUMNS = (('Title', 'title'), ('Artist', 'artist'), ('Album', 'album'), ('Duration', 'duration'),
+               ('Path', 'path'), ('BPM', 'bpm'), ('Plays', 'play_count'))
+
+    def __init__(self, playlist, library, parent=None):
+        super().__init__(parent)
+        # The playlist list is never reordered; the view goes through a permutation
+        self.playlist = playlist
+        self.library = library
+        self.library_rows = []
+        self.path_keys = []
+        self.name_keys = []
+        self.order = []
+        self.positions = []
+        self.current = -1
+        self.sort_column = -1
+        self.sort_order = Qt.SortOrder.AscendingOrder
+        self.revision = 0
+        self.keys = {}
+        self.vocab_keys = {field: [] for field in MediaLibrary.TEXT_FIELDS}
+        self.vocab_ranks = {}
+        try:
+            locale.setlocale(locale.LC_COLLATE, '')
+        except locale.Error as e:
+            print(f"Warning: Could not set collation locale: {str(e)}")
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        track = self.order[index.row()]
+        field = self.COLUMNS[index.column()][1]
+        if role == Qt.ItemDataRole.FontRole and track == self.current:
+            font = QFont()
+            font.setBold(True)
+            return font
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.playlist[track]
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if field == 'path':
+            return self.playlist[track]
+        value = self.library.value(self.library_rows[track], field)
+        if field in MediaLibrary.TEXT_FIELDS:
+            # Tracks without tags still show something in the title column
+            return value or (os.path.basename(self.playlist[track]) if field == 'title' else '')
+        if np.isnan(value):
+            return ''
+        if field == 'duration':
+            seconds = int(value) // 1000
+            hours, minutes = seconds // 3600, seconds // 60 % 60
+            return f"{hours}:{minutes:02d}:{seconds % 60:02d}" if hours else f"{minutes}:{seconds % 60:02d}"
+        return f"{value:.0f}"
+
+    def appendTrack(self, library_row):
+        # New tracks go to the end of the view until the next sort
+        track = len(self.order)
+        self.beginInsertRows(QModelIndex(), track, track)
+        self.library_rows.append(library_row)
+        self.path_keys.append(naturalSortKey(self.playlist[track]))
+        self.name_keys.append(naturalSortKey(os.path.basename(self.playlist[track])))
+        self.order.append(track)
+        self.positions.append(track)
+        self.revision += 1
+        self.endInsertRows()
+
+    def removeTrack(self, track):
+        row = self.positions[track]
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.library_rows[track]
+        del self.path_keys[track]
+        del self.name_keys[track]
+        del self.order[row]
+        self.order = [i - 1 if i > track else i for i in self.order]
+        self.positions = [0] * len(self.order)
+        for position, i in enumerate(self.order):
+            self.positions[i] = position
+        if self.current == track:
+            self.current = -1
+        elif self.current > track:
+            self.current -= 1
+        self.revision += 1
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.library_rows = []
+        self.path_keys = []
+        self.name_keys = []
+        self.order = []
+        self.positions = []
+        self.current = -1
+        self.revision += 1
+        self.keys.clear()
+        self.endResetModel()
+
+    def setCurrent(self, track):
+        previous, self.current = self.current, track
+        for i in (previous, track):
+            if 0 <= i < len(self.order):
+                row = self.positions[i]
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def trackChanged(self, library_row):
+        # Repaint only; sort keys are revalidated against the library revision
+        if self.order:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.order) - 1, len(self.COLUMNS) - 1))
+
+    def sortKey(self, field):
+        # Cached per column until the playlist or the library changes
+        revision = (self.revision, None if field == 'path' else self.library.revision)
+        cached = self.keys.get(field)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        rows = np.array(self.library_rows, dtype=np.intp)
+        if field == 'path':
+            # Collation keys are built as tracks are added, so this is only a sort
+            key = rankKeys(self.path_keys)
+        elif field in MediaLibrary.TEXT_FIELDS:
+            # Rank the (small) vocabulary, then gather by dictionary code
+            vocab = self.library.vocab[field]
+            keys = self.vocab_keys[field]
+            if len(keys) != len(vocab):
+                keys.extend(naturalSortKey(value) for value in vocab[len(keys):])
+                self.vocab_ranks[field] = rankKeys(keys)
+            codes = self.library.columns[field][rows]
+            key = self.vocab_ranks[field][codes]
+            if field == 'title':
+                # Untagged tracks display their file name, so they sort by it among the titles
+                untitled = np.flatnonzero(codes == 0)
+                if len(untitled):
+                    ranks = rankKeys(keys + [self.name_keys[i] for i in untitled])
+                    key = ranks[codes]
+                    key[untitled] = ranks[len(keys):]
+        else:
+            key = self.library.columns[field][rows]
+        self.keys[field] = (revision, key)
+        return key
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        if not self.order:
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        tracks = [self.order[index.row()] for index in persistent]
+        if column < 0:
+            permutation = np.arange(len(self.order))
+        else:
+            key = self.sortKey(self.COLUMNS[column][1])
+            # Stable both ways, missing values last both ways
+            if order == Qt.SortOrder.DescendingOrder:
+                key = -key
+            permutation = np.argsort(key, kind='stable')
+        positions = np.empty_like(permutation)
+        positions[permutation] = np.arange(len(permutation))
+        self.order = permutation.tolist()
+        self.positions = positions.tolist()
+        self.changePersistentIndexList(persistent, [self.index(self.positions[track], index.column())
+                                                    for track, index in zip(tracks, persistent)])
+        self.layoutChanged.emit()
+
+    def columnFor(self, field):
+        return [name for _, name in self.COLUMNS].index(field)
+
+    def track(self, row):
+        return self.order[row]
+
+    def step(self, track, offset, wrap=False):
+        # Neighbouring track in view order; from no track, start at the top
+        if not self.order:
+            return None
+        if 0 <= track < len(self.positions):
+            row = self.positions[track] + offset
+        else:
+            row = offset - 1 if offset > 0 else -1
+        if wrap:
+            row %= len(self.order)
+        return self.order[row] if 0 <= row < len(self.order) else None
+
+class PlaylistWidget(QTableView):
+    def __init__(self, model, player, parent=None):
         super().__init__(parent)
+        self.player = player
+        self.setModel(model)
         self.setAcceptDrops(True)
         self.setDragEnabled(True)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.verticalHeader().hide()
+        # Fixed row heights keep very long playlists cheap to lay out
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(25)
+        self.horizontalHeader().setStretchLastSection(True)
+        self.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.horizontalHeader().setSectionsMovable(True)
+        self.setSortingEnabled(True)
         self.setStyleSheet("""
-            QListWidget {
+            QTableView {
                 background-color: #1a1a1a;
                 border: none;
                 color: #cccccc;
             }
-            QListWidget::item {
-                height: 25px;
+            QTableView::item {
                 padding: 5px;
                 border-bottom: 1px solid #333333;
             }
-            QListWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #333333;
                 color: white;
             }
-            QListWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #2a2a2a;
             }
+            QHeaderView::section {
+                background-color: #1a1a1a;
+                color: #cccccc;
+                border: none;
+                border-bottom: 1px solid #333333;
+                padding: 4px;
+            }
         """)
 
+    def setCurrentTrack(self, track):
+        model = self.model()
+        model.setCurrent(track)
+        if 0 <= track < len(model.positions):
+            row = model.positions[track]
+            self.selectRow(row)
+            self.scrollTo(model.index(row, 0))
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.accept()
         else:
             event.ignore()
 
+    def dragMoveEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.accept()
+        else:
+            event.ignore()
+
     def dropEvent(self, event):
         files = []
         for url in event.mimeData().urls():
             if url.isLocalFile():
                 files.append(url.toLocalFile())
-        self.parent().addFilesToPlaylist(files)
+        self.player.addFilesToPlaylist(files)
 
 class RhythmsPlayer(QMainWindow):
     def __init__(self):
@@ -396,6 +2781,8 @@ class RhythmsPlayer(QMainWindow):
         try:
             self.instance = vlc.Instance()
             self.mediaplayer = self.instance.media_player_new()
+            # Second player used as the incoming side of a crossfade
+            self.fade_player = self.instance.media_player_new()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to initialize VLC: {str(e)}")
             sys.exit(1)
@@ -408,16 +2795,47 @@ class RhythmsPlayer(QMainWindow):
         self.a_point = None
         self.b_point = None
         self.ab_repeat_active = False
+        self.crossfade = CrossfadeEngine()
+        self.crossfade_enabled = False
+        self.audio_taps = [AudioTap(self.mediaplayer), AudioTap(self.fade_player)]
+        self.visualizer_enabled = False
+        self.telemetry = PlaybackTelemetry()
+        self.telemetry.attach(self.mediaplayer)
+        self.telemetry.attach(self.fade_player)
+        self.history = PlayHistory()
+        self.media_cache = MediaCache()
+        self.media_pool = MediaPool()
+        self.media_entry = None
+        self.library = MediaLibrary()
+        self.syncLibraryHistory()
+        self.library.listeners.append(self.libraryTrackChanged)
+        self.smart_playlists = {}
+        self.active_smart_playlist = None
+        self.metadata_scanner = MetadataScanner(self.instance, self)
+        self.metadata_scanner.scanned.connect(self.metadataScanned)
+        self.analysis_cache = AnalysisCache()
+        self.analysis_queue = AnalysisQueue(self.analysis_cache, self)
+        self.analysis_queue.finished.connect(self.analysisFinished)
+        self.analysis_queue.failed.connect(self.analysisFailed)
+        self.beat_grids = {}
+        self.snap_to_beats = False
+        self.auto_trim = False
+        self.skip_intros = False
+        self.playback_end = None
+        self.scene_indexes = {}
+        self.jump_by_scenes = False
 
         # Initialize additional variables
         self.video_adjustments = {adj: 0 for adj in VideoAdjustment}
         self.equalizer = None
         self.subtitle_tracks = []
         self.current_subtitle_track = -1
+        self.subtitle_file = None
         self.subtitle_font = QFont()
 
         self.setupUI()
         self.loadSettings()
+        self.updateSmartPlaylistMenu()
 
     def setupUI(self):
         # Create central widget and layout
@@ -465,11 +2883,37 @@ class RhythmsPlayer(QMainWindow):
         self.subtitle_panel = SubtitlePanel(self)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.subtitle_panel)
         
+        # Create visualizer panel
+        self.visualizer_panel = VisualizerPanel(self)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.visualizer_panel)
+        self.visualizer_panel.hide()
+
+        # Create playback health panel, sampled twice a second while playing
+        self.telemetry_panel = TelemetryPanel(self.telemetry, self)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.telemetry_panel)
+        self.telemetry_panel.hide()
+        self.telemetry_timer = QTimer(self)
+        self.telemetry_timer.setInterval(500)
+        self.telemetry_timer.timeout.connect(self.sampleTelemetry)
+        self.telemetry_timer.start()
+
+        # Create export panel
+        self.export_queue = ExportQueue(parent=self)
+        self.export_panel = ExportPanel(self.export_queue, self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.export_panel)
+        self.export_panel.hide()
+        
         # Add View menu for showing/hiding panels
         view_menu = self.menuBar().addMenu("View")
         view_menu.addAction(self.video_panel.toggleViewAction())
         view_menu.addAction(self.eq_panel.toggleViewAction())
         view_menu.addAction(self.subtitle_panel.toggleViewAction())
+        view_menu.addAction(self.export_panel.toggleViewAction())
+        view_menu.addAction(self.visualizer_panel.toggleViewAction())
+        view_menu.addAction(self.telemetry_panel.toggleViewAction())
+        view_menu.addSeparator()
+        view_menu.addAction("Top Tracks This Month", self.showTopTracks)
+        view_menu.addAction("Media Cache Statistics", self.showCacheStats)
 
     def createMenuBar(self):
         menubar = self.menuBar()
@@ -483,6 +2927,25 @@ class RhythmsPlayer(QMainWindow):
         open_multiple_action = QAction("Add Files to Playlist", self)
         open_multiple_action.triggered.connect(self.addFiles)
         file_menu.addAction(open_multiple_action)
+        file_menu.addSeparator()
+
+        export_clip_action = QAction("Export A-B Clip...", self)
+        export_clip_action.triggered.connect(self.exportClip)
+        file_menu.addAction(export_clip_action)
+
+        export_playlist_action = QAction("Export Playlist...", self)
+        export_playlist_action.triggered.connect(self.exportPlaylist)
+        file_menu.addAction(export_playlist_action)
+
+        # Smart playlists menu, filled from settings
+        self.smart_menu = menubar.addMenu("Smart Playlists")
+
+        # Analysis menu
+        analysis_menu = menubar.addMenu("Analysis")
+        analysis_menu.addAction("Analyze Tempo (Library)", self.analyzeLibraryTempo)
+        analysis_menu.addAction("Sort Playlist by BPM", lambda: self.sortPlaylist('bpm'))
+        analysis_menu.addAction("Analyze Silence and Intros (Playlist)", self.analyzePlaylistTrim)
+        analysis_menu.addAction("Build Scene Index (Current File)", lambda: self.buildSceneIndex(self.current_file))
 
         # Playback menu
         playback_menu = menubar.addMenu("Playback")
@@ -502,15 +2965,68 @@ class RhythmsPlayer(QMainWindow):
         playback_menu.addAction(self.repeat_one_action)
         playback_menu.addAction(self.repeat_all_action)
         playback_menu.addAction(self.shuffle_action)
+        playback_menu.addSeparator()
+
+        self.snap_action = QAction("Snap A-B to Beats", self)
+        self.snap_action.setCheckable(True)
+        self.snap_action.toggled.connect(lambda checked: setattr(self, 'snap_to_beats', checked))
+        playback_menu.addAction(self.snap_action)
+
+        self.trim_action = QAction("Skip Leading/Trailing Silence", self)
+        self.trim_action.setCheckable(True)
+        self.trim_action.toggled.connect(self.setAutoTrim)
+        playback_menu.addAction(self.trim_action)
+
+        self.intro_action = QAction("Skip Series Intros/Outros", self)
+        self.intro_action.setCheckable(True)
+        self.intro_action.toggled.connect(self.setSkipIntros)
+        playback_menu.addAction(self.intro_action)
+
+        self.scenes_action = QAction("Jump by Scenes", self)
+        self.scenes_action.setCheckable(True)
+        self.scenes_action.toggled.connect(self.setJumpByScenes)
+        playback_menu.addAction(self.scenes_action)
+        playback_menu.addSeparator()
+
+        # Crossfade
+        self.crossfade_action = QAction("Crossfade", self)
+        self.crossfade_action.setCheckable(True)
+        self.crossfade_action.toggled.connect(self.setCrossfadeEnabled)
+        playback_menu.addAction(self.crossfade_action)
+
+        curve_menu = playback_menu.addMenu("Crossfade Curve")
+        curve_group = QActionGroup(self)
+        self.crossfade_curve_actions = {}
+        for curve in CrossfadeCurve:
+            action = QAction(curve.value, self)
+            action.setCheckable(True)
+            action.setChecked(curve == self.crossfade.curve)
+            action.triggered.connect(lambda checked, c=curve: self.setCrossfadeCurve(c))
+            curve_group.addAction(action)
+            curve_menu.addAction(action)
+            self.crossfade_curve_actions[curve] = action
+
+        length_menu = playback_menu.addMenu("Crossfade Length")
+        length_group = QActionGroup(self)
+        self.crossfade_length_actions = {}
+        for seconds in (2, 4, 6, 8, 10, 12):
+            action = QAction(f"{seconds} s", self)
+            action.setCheckable(True)
+            action.setChecked(seconds * 1000 == self.crossfade.duration)
+            action.triggered.connect(lambda checked, s=seconds: self.setCrossfadeLength(s))
+            length_group.addAction(action)
+            length_menu.addAction(action)
+            self.crossfade_length_actions[seconds] = action
 
     def createPlaylistDock(self):
         # Create playlist dock widget
         playlist_dock = QDockWidget("Playlist", self)
         playlist_dock.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea)
         
-        # Create playlist widget
-        self.playlist_widget = PlaylistWidget(self)
-        self.playlist_widget.itemDoubleClicked.connect(self.playlistItemDoubleClicked)
+        # Create playlist table; sorting only permutes the view, not self.playlist
+        self.playlist_model = PlaylistModel(self.playlist, self.library, self)
+        self.playlist_widget = PlaylistWidget(self.playlist_model, self)
+        self.playlist_widget.doubleClicked.connect(self.playlistItemDoubleClicked)
         
         playlist_dock.setWidget(self.playlist_widget)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, playlist_dock)
@@ -617,41 +3133,483 @@ class RhythmsPlayer(QMainWindow):
 
     def addToPlaylist(self, filename):
         self.playlist.append(filename)
-        item = QListWidgetItem(os.path.basename(filename))
-        self.playlist_widget.addItem(item)
+        self.playlist_model.appendTrack(self.library.addTrack(filename))
+        if not self.library.hasMetadata(filename):
+            self.metadata_scanner.scan(filename)
+        if self.auto_trim or self.skip_intros:
+            self.analysis_queue.submit('trim', filename, analyzeTrim)
+
+    def removeFromPlaylist(self, index):
+        del self.playlist[index]
+        self.playlist_model.removeTrack(index)
+        if index < self.current_index:
+            self.current_index -= 1
+        elif index == self.current_index:
+            # Keep playing the track, it just no longer has a playlist slot
+            self.current_index = -1
+
+    def metadataScanned(self, path, fields):
+        self.library.updateTrack(path, **fields)
+
+    def analyzeLibraryTempo(self):
+        # Tracks already in the analysis cache are picked up without a worker
+        for path in self.library.paths + self.playlist:
+            row = self.library.rows.get(path)
+            if row is None or np.isnan(self.library.columns['bpm'][row]):
+                self.analysis_queue.submit('tempo', path, analyzeTempo)
+
+    def analyzePlaylistTrim(self):
+        for path in self.playlist:
+            self.analysis_queue.submit('trim', path, analyzeTrim)
+
+    def analysisFinished(self, kind, path, result):
+        if kind == 'tempo':
+            self.beat_grids[path] = result['beats']
+            self.library.updateTrack(path, bpm=float(result['bpm']))
+        elif kind == 'trim':
+            self.library.updateTrack(path, trim_start=int(result['trim_start']),
+                                     trim_end=int(result['trim_end']))
+            self.matchSeries(path, result)
+        elif kind.startswith('subsync') and path == self.current_file:
+            offset = int(result['offset'])
+            self.subtitle_panel.delay_spin.setValue(offset)
+            self.subtitle_panel.sync_label.setText(
+                f"Offset {offset} ms, drift {float(result['drift']) * 1e6:.0f} ppm "
+                f"(confidence {float(result['confidence']):.2f})")
+        elif kind == 'scenes':
+            self.scene_indexes[path] = result['scenes']
+        elif kind == 'series':
+            intro_end = int(result['intro_end'])
+            outro_start = int(result['outro_start'])
+            self.library.updateTrack(path, intro_end=intro_end if intro_end >= 0 else None,
+                                     outro_start=outro_start if outro_start >= 0 else None)
+
+    def analysisFailed(self, kind, path, message):
+        if kind.startswith('subsync') and path == self.current_file:
+            self.subtitle_panel.sync_label.setText(f"Auto sync failed: {message}")
+
+    def matchSeries(self, path, result):
+        # Compare with the neighbouring episode: same folder and extension, adjacent by name
+        siblings = self.library.siblings(path)
+        if path not in siblings:
+            return
+        index = siblings.index(path)
+        neighbours = siblings[index - 1:index] + siblings[index + 1:index + 2]
+        # The neighbours' cached fingerprints are read on the analysis queue's thread
+        self.analysis_queue.call(self.pairEpisodes, path, result, neighbours)
+
+    def pairEpisodes(self, path, result, neighbours):
+        for sibling in neighbours:
+            other = self.analysis_cache.load(sibling, 'trim')
+            if other is None:
+                continue
+            for source, a, b in ((path, result, other), (sibling, other, result)):
+                self.analysis_queue.submit('series', source, matchEpisodes,
+                                           a['intro_fingerprint'], b['intro_fingerprint'],
+                                           a['outro_fingerprint'], b['outro_fingerprint'],
+                                           int(a['outro_offset']))
+            return
+
+    def setJumpByScenes(self, enabled):
+        self.jump_by_scenes = enabled
+        if enabled:
+            self.buildSceneIndex(self.current_file)
+
+    def buildSceneIndex(self, path):
+        if path and os.path.splitext(urllib.parse.urlparse(path).path if '://' in path else path)[1].lower() in VIDEO_EXTENSIONS:
+            self.analysis_queue.submit('scenes', path, analyzeScenes)
+
+    def sceneIndex(self):
+        if not self.jump_by_scenes or not self.current_file:
+            return None
+        if self.current_file not in self.scene_indexes:
+            result = self.analysis_cache.load(self.current_file, 'scenes')
+            if result is None:
+                return None
+            self.scene_indexes[self.current_file] = result['scenes']
+        return self.scene_indexes[self.current_file]
+
+    def jumpScene(self, direction):
+        # Returns False when there is no scene to jump to, so the caller changes track
+        scenes = self.sceneIndex()
+        if scenes is None or not self.mediaplayer.is_playing():
+            return False
+        position = self.mediaplayer.get_time()
+        if direction > 0:
+            later = scenes[scenes > position + 500]
+            if len(later) == 0:
+                return False
+            self.mediaplayer.set_time(int(later[0]))
+            self.telemetry.markSeek(self.mediaplayer)
+        else:
+            # Pressed shortly after a cut, go to the cut before it
+            earlier = scenes[scenes < position - 1500]
+            if len(earlier) == 0:
+                return False
+            self.mediaplayer.set_time(int(earlier[-1]))
+            self.telemetry.markSeek(self.mediaplayer)
+        return True
+
+    def setAutoTrim(self, enabled):
+        self.auto_trim = enabled
+        if enabled:
+            self.analyzePlaylistTrim()
+
+    def setSkipIntros(self, enabled):
+        self.skip_intros = enabled
+        if enabled:
+            self.analyzePlaylistTrim()
+
+    def playbackRange(self, path):
+        # Start and stop offsets in ms for the enabled trims; stop is None for the natural end
+        row = self.library.rows.get(path)
+        if row is None:
+            return 0, None
+
+        def field(name):
+            value = self.library.columns[name][row]
+            return None if np.isnan(value) else int(value)
+
+        start, stop = 0, None
+        if self.auto_trim:
+            start = field('trim_start') or 0
+            stop = field('trim_end')
+        if self.skip_intros:
+            intro_end = field('intro_end')
+            outro_start = field('outro_start')
+            if intro_end is not None:
+                start = max(start, intro_end)
+            if outro_start is not None:
+                stop = outro_start if stop is None else min(stop, outro_start)
+        if stop is not None and stop <= start:
+            return 0, None
+        return start, stop
+
+    def beatGrid(self, path):
+        if path not in self.beat_grids:
+            result = self.analysis_cache.load(path, 'tempo')
+            self.beat_grids[path] = result['beats'] if result is not None else None
+        return self.beat_grids[path]
+
+    def snapToBeat(self, position):
+        beats = self.beatGrid(self.current_file) if self.snap_to_beats else None
+        if beats is None or len(beats) == 0:
+            return position
+        i = int(np.searchsorted(beats, position))
+        candidates = beats[max(i - 1, 0):i + 1]
+        return int(candidates[np.argmin(np.abs(candidates.astype(np.int64) - position))])
+
+    def sortPlaylist(self, field):
+        # Stable sort; tracks without a value go last
+        self.playlist_widget.sortByColumn(self.playlist_model.columnFor(field), Qt.SortOrder.AscendingOrder)
+        self.playlist_widget.setCurrentTrack(self.current_index)
+
+    def syncLibraryHistory(self):
+        for path, track in self.history.track_ids.items():
+            self.library.updateTrack(path, notify=False,
+                                     play_count=self.history.play_count[track],
+                                     skip_count=self.history.skip_count[track],
+                                     last_played=self.history.last_played[track] or None)
+
+    def libraryTrackChanged(self, row):
+        # Keep the loaded smart playlist in step with metadata and history changes
+        self.playlist_model.trackChanged(row)
+        playlist = self.smart_playlists.get(self.active_smart_playlist)
+        if playlist is None:
+            return
+        path = self.library.paths[row]
+        change = playlist.update(self.library, row)
+        if change > 0 and path not in self.playlist:
+            self.addToPlaylist(path)
+        elif change < 0:
+            # Recording a play or skip lands here while the caller still holds playlist
+            # indexes, so the removal waits until that track change is done
+            QTimer.singleShot(0, lambda: self.removeSmartPlaylistTrack(playlist, row))
+
+    def removeSmartPlaylistTrack(self, playlist, row):
+        path = self.library.paths[row]
+        if (self.smart_playlists.get(self.active_smart_playlist) is playlist and
+                row not in playlist.members and path in self.playlist):
+            self.removeFromPlaylist(self.playlist.index(path))
+
+    def newSmartPlaylist(self):
+        name, ok = QInputDialog.getText(self, "New Smart Playlist", "Name:")
+        if not ok or not name:
+            return
+        rule, ok = QInputDialog.getText(self, "New Smart Playlist",
+                                        "Rule (e.g. genre = jazz AND duration < 5 min AND NOT played in 30 days):")
+        if not ok or not rule:
+            return
+        try:
+            self.smart_playlists[name] = SmartPlaylist(name, rule)
+        except ValueError as e:
+            QMessageBox.warning(self, "Smart Playlist", f"Invalid rule: {str(e)}")
+            return
+        self.updateSmartPlaylistMenu()
+        self.loadSmartPlaylist(name)
+
+    def deleteSmartPlaylist(self):
+        names = list(self.smart_playlists)
+        if not names:
+            return
+        name, ok = QInputDialog.getItem(self, "Delete Smart Playlist", "Playlist:", names, 0, False)
+        if ok:
+            del self.smart_playlists[name]
+            if self.active_smart_playlist == name:
+                self.active_smart_playlist = None
+            self.updateSmartPlaylistMenu()
+
+    def updateSmartPlaylistMenu(self):
+        self.smart_menu.clear()
+        self.smart_menu.addAction("New Smart Playlist...", self.newSmartPlaylist)
+        self.smart_menu.addAction("Delete Smart Playlist...", self.deleteSmartPlaylist)
+        if self.smart_playlists:
+            self.smart_menu.addSeparator()
+        for name in sorted(self.smart_playlists):
+            self.smart_menu.addAction(name, lambda n=name: self.loadSmartPlaylist(n))
+
+    def loadSmartPlaylist(self, name):
+        playlist = self.smart_playlists[name]
+        paths = playlist.evaluate(self.library)
+        self.clearPlaylist()
+        self.active_smart_playlist = name
+        self.addFilesToPlaylist(paths)
 
     def clearPlaylist(self):
+        self.active_smart_playlist = None
         self.playlist.clear()
-        self.playlist_widget.clear()
+        self.playlist_model.clear()
         self.current_index = -1
         self.stop()
 
+    def selectExportProfile(self):
+        names = [profile.value for profile in ExportProfile]
+        name, ok = QInputDialog.getItem(self, "Export", "Format:", names, 0, False)
+        return ExportProfile(name) if ok else None
+
+    def exportClip(self):
+        if not self.current_file or self.a_point is None or self.b_point is None or self.b_point <= self.a_point:
+            QMessageBox.information(self, "Export", "Set both A and B points on the current track first.")
+            return
+        profile = self.selectExportProfile()
+        if profile is None:
+            return
+        extension = EXPORT_PROFILES[profile][0]
+        base = os.path.splitext(os.path.basename(self.current_file))[0]
+        suggested = f"{base} {self.a_point // 1000}-{self.b_point // 1000}.{extension}"
+        destination, _ = QFileDialog.getSaveFileName(self, "Export A-B Clip", suggested,
+                                                     f"{profile.value} (*.{extension})")
+        if not destination:
+            return
+        if self.exportPathKey(destination) == self.exportPathKey(self.current_file):
+            # VLC would truncate the file it is reading from
+            QMessageBox.warning(self, "Export", "The clip cannot be saved over the file it is cut from.")
+            return
+        self.export_queue.add(self.current_file, destination, profile, self.a_point, self.b_point)
+        self.export_panel.show()
+
+    def exportPathKey(self, path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def exportPlaylist(self):
+        if not self.playlist:
+            return
+        profile = self.selectExportProfile()
+        if profile is None:
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Export Playlist To")
+        if not directory:
+            return
+        extension = EXPORT_PROFILES[profile][0]
+        # Never write over a source or another export; same-named tracks get " (2)", " (3)", ...
+        taken = {self.exportPathKey(path) for path in self.playlist}
+        taken.update(self.exportPathKey(job.destination) for job in self.export_queue.jobs
+                     if job.status in ('queued', 'running', 'cancelling'))
+        for path in self.playlist:
+            base = os.path.splitext(os.path.basename(path))[0]
+            destination = os.path.join(directory, f"{base}.{extension}")
+            suffix = 2
+            while self.exportPathKey(destination) in taken:
+                destination = os.path.join(directory, f"{base} ({suffix}).{extension}")
+                suffix += 1
+            taken.add(self.exportPathKey(destination))
+            self.export_queue.add(path, destination, profile)
+        self.export_panel.show()
+
     def playlistItemDoubleClicked(self, item):
-        index = self.playlist_widget.row(item)
+        index = self.playlist_model.track(item.row())
         if 0 <= index < len(self.playlist):
+            self.playIndex(index)
+
+    def playIndex(self, index):
+        if self.mediaplayer.get_state() in (vlc.State.Playing, vlc.State.Paused):
+            self.recordPlayEvent(PlayEvent.SKIPPED)
+        if self.crossfade_enabled and self.mediaplayer.is_playing():
+            self.crossfadeTo(index)
+        else:
             self.current_index = index
             self.loadMedia(self.playlist[index])
 
+    def crossfadeTo(self, index, duration=None):
+        # Finish a running fade first; it stops the player that is about to be reused
+        self.crossfade.cancel()
+        # Swap players so the rest of the UI follows the incoming track
+        outgoing = self.mediaplayer
+        self.mediaplayer, self.fade_player = self.fade_player, outgoing
+        self.mediaplayer.audio_set_volume(0)
+        self.setPlaybackSpeed(self.speed_combo.currentText())
+        self.toggleDeinterlace(self.video_panel.deinterlace_cb.isChecked())
+        self.setAspectRatio(self.video_panel.aspect_combo.currentText())
+        self.current_index = index
+        self.loadMedia(self.playlist[index])
+        self.crossfade.start(outgoing, self.mediaplayer, duration)
+        if self.visualizer_enabled:
+            self.visualizer_panel.spectrum.setTap(self.currentAudioTap())
+
+    def recordPlayEvent(self, event):
+        if self.current_file:
+            self.history.record(self.current_file, event, self.mediaplayer.get_time())
+            stats = self.history.stats(self.current_file)
+            self.library.updateTrack(self.current_file, play_count=stats['play_count'],
+                                     skip_count=stats['skip_count'],
+                                     last_played=stats['last_played'])
+
+    def showTopTracks(self):
+        now = time.localtime()
+        month_start = time.mktime((now.tm_year, now.tm_mon, 1, 0, 0, 0, 0, 0, -1))
+        top = self.history.topTracks(20, since=month_start)
+        if top:
+            text = "\n".join(f"{count:4d}  {os.path.basename(path)}" for path, count in top)
+        else:
+            text = "No tracks played this month."
+        QMessageBox.information(self, "Top Tracks This Month", text)
+
+    def prefetchUpcoming(self, count=2):
+        if not self.playlist:
+            return
+        wrap = self.playback_mode == PlaybackMode.REPEAT_ALL
+        upcoming = [self.playlist_model.step(self.current_index, offset, wrap) for offset in range(1, count + 1)]
+        self.media_cache.prefetch([self.playlist[i] for i in upcoming if i is not None])
+
+    def showCacheStats(self):
+        stats = self.media_cache.stats()
+        pool = self.media_pool.stats()
+        QMessageBox.information(self, "Media Cache", "\n".join([
+            f"Hit rate: {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses)",
+            f"Cached files: {stats['entries']} ({stats['used_bytes'] / 1024 ** 2:.1f} MB "
+            f"of {self.media_cache.max_bytes / 1024 ** 2:.0f} MB)",
+            f"Served from cache: {stats['bytes_served'] / 1024 ** 2:.1f} MB",
+            f"Fetched: {stats['bytes_fetched'] / 1024 ** 2:.1f} MB",
+            f"Evictions: {stats['evictions']}, errors: {stats['errors']}",
+            "",
+            f"Parsed media pool: {pool['hit_rate']:.0%} hit rate ({pool['hits']} hits, {pool['misses']} misses)",
+            f"Pooled media: {pool['entries']} of {self.media_pool.max_entries} "
+            f"(~{pool['used_bytes'] / 1024 ** 2:.1f} MB), evictions: {pool['evictions']}",
+            f"Average parse: {pool['parse_time'] * 1000:.0f} ms, time saved: {pool['time_saved']:.2f} s"
+        ]))
+
+    def currentAudioTap(self):
+        for tap in self.audio_taps:
+            if tap.player is self.mediaplayer:
+                return tap
+        return None
+
+    def setVisualizerEnabled(self, enabled):
+        self.visualizer_enabled = enabled
+        self.visualizer_panel.spectrum.setTap(self.currentAudioTap() if enabled else None)
+
+    def sampleTelemetry(self):
+        try:
+            if getattr(self, 'media', None) is not None and self.mediaplayer.is_playing():
+                self.telemetry.sample(self.media, self.mediaplayer)
+                if self.telemetry_panel.isVisible():
+                    self.telemetry_panel.refresh()
+        except Exception as e:
+            print(f"Warning: Could not sample playback stats: {str(e)}")
+
+    def exportTelemetryCsv(self):
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Playback Stats", "playback_stats.csv",
+                                                  "CSV Files (*.csv)")
+        if filename:
+            try:
+                self.telemetry.exportCsv(filename)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to export stats: {str(e)}")
+
+    def exportTelemetryJson(self):
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Playback Stats", "playback_stats.json",
+                                                  "JSON Files (*.json)")
+        if filename:
+            try:
+                self.telemetry.exportJson(filename, self.mediaplayer)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to export stats: {str(e)}")
+
+    def nextTrackIndex(self):
+        # Track the end-of-track handling in update_ui would advance to
+        if self.playback_mode == PlaybackMode.REPEAT_ALL and self.playlist:
+            return self.playlist_model.step(self.current_index, 1, wrap=True)
+        return None
+
+    def setCrossfadeEnabled(self, enabled):
+        self.crossfade_enabled = enabled
+        if not enabled:
+            self.crossfade.cancel()
+
+    def setCrossfadeCurve(self, curve):
+        self.crossfade.curve = curve
+        self.crossfade_curve_actions[curve].setChecked(True)
+
+    def setCrossfadeLength(self, seconds):
+        self.crossfade.duration = seconds * 1000
+        if seconds in self.crossfade_length_actions:
+            self.crossfade_length_actions[seconds].setChecked(True)
+
     def loadMedia(self, filename):
         try:
+            if filename != self.current_file:
+                self.subtitle_file = None
             self.current_file = filename
             if not hasattr(self.instance, 'media_new'):
                 QMessageBox.critical(self, "Error", "VLC instance does not support media loading")
                 return
                 
-            self.media = self.instance.media_new(filename)
-            if not self.media:
-                QMessageBox.critical(self, "Error", "Could not create media")
-                return
-                
+            # Serve network media from the local cache when a copy is present
+            location = self.media_cache.resolve(filename)
+            # Start past leading silence or intros and end early at trailing ones
+            start, self.playback_end = self.playbackRange(filename)
+
             if not hasattr(self.mediaplayer, 'set_media'):
                 QMessageBox.critical(self, "Error", "Media player does not support setting media")
                 return
-                
-            self.mediaplayer.set_media(self.media)
-            
-            if hasattr(self.media, 'parse'):
-                self.media.parse()
+
+            # Reuse the parsed media from a recent visit; options are part of the key
+            key = (location, start, self.playback_end)
+            self.media_entry = self.media_pool.get(key)
+            if self.media_entry is not None and self.media_entry['media'] is self.media and self.fade_player.is_playing():
+                # Crossfading into the same track needs a second media
+                self.media_pool.discard(key)
+                self.media_entry = None
+
+            if self.media_entry is not None:
+                self.media = self.media_entry['media']
+                self.mediaplayer.set_media(self.media)
+            else:
+                self.media = self.instance.media_new(location)
+                if not self.media:
+                    QMessageBox.critical(self, "Error", "Could not create media")
+                    return
+                if start:
+                    self.media.add_option(f":start-time={start / 1000.0:.3f}")
+                if self.playback_end is not None:
+                    self.media.add_option(f":stop-time={self.playback_end / 1000.0:.3f}")
+
+                self.mediaplayer.set_media(self.media)
+
+                if hasattr(self.media, 'parse'):
+                    started = time.perf_counter()
+                    self.media.parse()
+                    self.media_entry = self.media_pool.add(key, self.media, time.perf_counter() - started)
 
             # Set video output
             if sys.platform.startswith('win'):
@@ -664,6 +3622,8 @@ class RhythmsPlayer(QMainWindow):
                 if hasattr(self.mediaplayer, 'set_nsobject'):
                     self.mediaplayer.set_nsobject(int(self.video_frame.winId()))
 
+            self.telemetry.markMedia(filename, self.mediaplayer)
+
             # Update window title
             self.setWindowTitle(f"Rhythms - {os.path.basename(filename)}")
 
@@ -685,9 +3645,12 @@ class RhythmsPlayer(QMainWindow):
 
             # Start playing
             self.playPause()
+            self.prefetchUpcoming()
+            if self.jump_by_scenes:
+                self.buildSceneIndex(filename)
             
             # Update playlist selection
-            self.playlist_widget.setCurrentRow(self.current_index)
+            self.playlist_widget.setCurrentTrack(self.current_index)
             
             # Update subtitle tracks if supported
             if hasattr(self, 'updateSubtitleTracks'):
@@ -707,6 +3670,7 @@ class RhythmsPlayer(QMainWindow):
             self.timer.start()
 
     def stop(self):
+        self.crossfade.cancel()
         self.mediaplayer.stop()
         self.play_button.setText("▶")
         self.timer.stop()
@@ -718,24 +3682,42 @@ class RhythmsPlayer(QMainWindow):
         self.b_button.setStyleSheet(self.b_button.styleSheet().replace("color: #ffb200;", ""))
 
     def playPrevious(self):
-        if self.playlist and self.current_index > 0:
-            self.current_index -= 1
-            self.loadMedia(self.playlist[self.current_index])
+        if self.jumpScene(-1):
+            return
+        index = self.playlist_model.step(self.current_index, -1)
+        if index is not None:
+            self.playIndex(index)
 
     def playNext(self):
-        if self.playlist and self.current_index < len(self.playlist) - 1:
-            self.current_index += 1
-            self.loadMedia(self.playlist[self.current_index])
+        if self.jumpScene(1):
+            return
+        index = self.playlist_model.step(self.current_index, 1)
+        if index is not None:
+            self.playIndex(index)
 
     def setVolume(self, volume):
-        self.mediaplayer.audio_set_volume(volume)
+        # While fading, the crossfade thread scales this volume onto both players
+        self.crossfade.volume = volume
+        if not self.crossfade.isActive():
+            self.mediaplayer.audio_set_volume(volume)
         if volume == 0:
             self.volume_button.setText("🔇")
         else:
             self.volume_button.setText("🔊")
 
     def setPosition(self, position):
+        # Snap to a scene cut within 1.5% of the track when jumping by scenes
+        scenes = self.sceneIndex()
+        length = self.mediaplayer.get_length()
+        if scenes is not None and len(scenes) and length > 0:
+            target = position * length / 1000
+            nearest = scenes[np.argmin(np.abs(scenes.astype(np.int64) - target))]
+            if abs(int(nearest) - target) <= 0.015 * length:
+                self.mediaplayer.set_time(int(nearest))
+                self.telemetry.markSeek(self.mediaplayer)
+                return
         self.mediaplayer.set_position(position / 1000.0)
+        self.telemetry.markSeek(self.mediaplayer)
 
     def setPlaybackSpeed(self, speed):
         speed_value = float(speed.replace('x', ''))
@@ -749,7 +3731,7 @@ class RhythmsPlayer(QMainWindow):
 
     def setPointA(self):
         if self.mediaplayer.is_playing():
-            self.a_point = self.mediaplayer.get_time()
+            self.a_point = self.snapToBeat(self.mediaplayer.get_time())
             self.a_button.setStyleSheet(self.a_button.styleSheet() + "color: #ffb200;")
             self.b_point = None
             self.b_button.setStyleSheet(self.b_button.styleSheet().replace("color: #ffb200;", ""))
@@ -757,7 +3739,7 @@ class RhythmsPlayer(QMainWindow):
 
     def setPointB(self):
         if self.mediaplayer.is_playing() and self.a_point is not None:
-            self.b_point = self.mediaplayer.get_time()
+            self.b_point = self.snapToBeat(self.mediaplayer.get_time())
             if self.b_point > self.a_point:
                 self.b_button.setStyleSheet(self.b_button.styleSheet() + "color: #ffb200;")
                 self.ab_repeat_active = True
@@ -774,16 +3756,17 @@ class RhythmsPlayer(QMainWindow):
                     return
 
                 self.play_button.setText("▶")
+
+                if self.mediaplayer.get_state() == vlc.State.Ended:
+                    self.recordPlayEvent(PlayEvent.PLAYED)
                 
                 # Handle playback modes
                 if self.playback_mode == PlaybackMode.REPEAT_ONE:
                     if hasattr(self.mediaplayer, 'play'):
                         self.mediaplayer.play()
-                elif self.playback_mode == PlaybackMode.REPEAT_ALL and self.current_index < len(self.playlist) - 1:
-                    self.playNext()
-                elif self.playback_mode == PlaybackMode.REPEAT_ALL:
-                    self.current_index = 0
-                    self.loadMedia(self.playlist[0])
+                elif self.playback_mode == PlaybackMode.REPEAT_ALL and self.playlist:
+                    self.current_index = self.playlist_model.step(self.current_index, 1, wrap=True)
+                    self.loadMedia(self.playlist[self.current_index])
                 return
 
             # Update time display
@@ -791,11 +3774,22 @@ class RhythmsPlayer(QMainWindow):
                 media_pos = int(self.mediaplayer.get_position() * 1000)
                 self.time_slider.setValue(media_pos)
 
+            # Start the crossfade early enough to overlap the tail of the track
+            if self.crossfade_enabled and not self.ab_repeat_active and not self.crossfade.isActive():
+                next_index = self.nextTrackIndex()
+                end = self.playback_end if self.playback_end is not None else self.mediaplayer.get_length()
+                remaining = end - self.mediaplayer.get_time()
+                if next_index is not None and 0 < remaining <= self.crossfade.duration:
+                    self.recordPlayEvent(PlayEvent.PLAYED)
+                    self.crossfadeTo(next_index, remaining)
+                    return
+
             # Check A-B repeat
             if self.ab_repeat_active and self.b_point and hasattr(self.mediaplayer, 'get_time') and hasattr(self.mediaplayer, 'set_time'):
                 current_time = self.mediaplayer.get_time()
                 if current_time >= self.b_point:
                     self.mediaplayer.set_time(self.a_point)
+                    self.telemetry.markSeek(self.mediaplayer)
 
             # Update time labels
             if hasattr(self.mediaplayer, 'get_time') and hasattr(self.mediaplayer, 'get_length'):
@@ -835,6 +3829,34 @@ class RhythmsPlayer(QMainWindow):
                             QFont.Weight.Bold if font_settings['bold'] else QFont.Weight.Normal,
                             font_settings['italic']
                         )
+
+                    # Load media cache limits
+                    if 'media_cache' in settings:
+                        cache = settings['media_cache']
+                        self.media_cache.max_bytes = cache.get('max_mb', 2048) * 1024 ** 2
+                        # Stored in kilobits per second, used in bytes per second
+                        self.media_cache.bandwidth = cache.get('bandwidth_kbps', 0) * 1000 // 8
+
+                    # Load smart playlists
+                    for name, rule in settings.get('smart_playlists', {}).items():
+                        try:
+                            self.smart_playlists[name] = SmartPlaylist(name, rule)
+                        except ValueError as e:
+                            print(f"Warning: Skipping smart playlist {name}: {str(e)}")
+
+                    # Load trim settings
+                    if 'trim' in settings:
+                        self.trim_action.setChecked(settings['trim'].get('silence', False))
+                        self.intro_action.setChecked(settings['trim'].get('intros', False))
+
+                    self.scenes_action.setChecked(settings.get('jump_by_scenes', False))
+
+                    # Load crossfade settings
+                    if 'crossfade' in settings:
+                        crossfade = settings['crossfade']
+                        self.setCrossfadeCurve(CrossfadeCurve[crossfade.get('curve', 'EQUAL_POWER')])
+                        self.setCrossfadeLength(crossfade.get('length', 6000) // 1000)
+                        self.crossfade_action.setChecked(crossfade.get('enabled', False))
         except Exception as e:
             print(f"Error loading settings: {str(e)}")
 
@@ -849,6 +3871,21 @@ class RhythmsPlayer(QMainWindow):
                     'size': self.subtitle_font.pointSize(),
                     'bold': self.subtitle_font.bold(),
                     'italic': self.subtitle_font.italic()
+                },
+                'media_cache': {
+                    'max_mb': self.media_cache.max_bytes // 1024 ** 2,
+                    'bandwidth_kbps': self.media_cache.bandwidth * 8 // 1000
+                },
+                'smart_playlists': {name: playlist.rule for name, playlist in self.smart_playlists.items()},
+                'jump_by_scenes': self.jump_by_scenes,
+                'trim': {
+                    'silence': self.auto_trim,
+                    'intros': self.skip_intros
+                },
+                'crossfade': {
+                    'enabled': self.crossfade_enabled,
+                    'curve': self.crossfade.curve.name,
+                    'length': self.crossfade.duration
                 }
             }
             with open('player_settings.json', 'w') as f:
@@ -857,6 +3894,16 @@ class RhythmsPlayer(QMainWindow):
             print(f"Error saving settings: {str(e)}")
 
     def closeEvent(self, event):
+        self.crossfade.cancel()
+        self.export_queue.close()
+        self.history.close()
+        self.metadata_scanner.close()
+        self.media_cache.close()
+        self.media_pool.clear()
+        for tap in self.audio_taps:
+            tap.close()
+        self.analysis_queue.close()
+        self.library.save()
         self.saveSettings()
         event.accept()
 
@@ -930,27 +3977,64 @@ class RhythmsPlayer(QMainWindow):
             print(f"Warning: Could not adjust equalizer: {str(e)}")
 
     def updateSubtitleTracks(self):
-        self.subtitle_panel.track_combo.clear()
-        self.subtitle_panel.track_combo.addItem("Disabled")
-        
-        if self.mediaplayer.video_get_spu_count() > 0:
-            description = self.mediaplayer.video_get_spu_description()
-            if description:
-                for d in description:
-                    self.subtitle_panel.track_combo.addItem(d.decode())
-                    
+        # Embedded tracks come from the pooled media's parse, since right after play()
+        # the player has not created its streams yet; an external file adds a track
+        # only the player knows about
+        entry = self.media_entry
+        descriptions = entry['subtitles'] if entry is not None and not self.subtitle_file else None
+        if descriptions is None:
+            descriptions = []
+            if self.mediaplayer.video_get_spu_count() > 0:
+                descriptions = self.mediaplayer.video_get_spu_description() or []
+
+        combo = self.subtitle_panel.track_combo
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem("Disabled", -1)
+        for track_id, name in descriptions:
+            # libvlc lists its own "Disable" entry with id -1
+            if track_id != -1:
+                combo.addItem((name or b'').decode(errors='replace'), track_id)
+        combo.setCurrentIndex(max(combo.findData(self.mediaplayer.video_get_spu()), 0))
+        combo.blockSignals(False)
+
     def setSubtitleTrack(self, index):
-        if index == 0:
-            self.mediaplayer.video_set_spu(-1)
-        else:
-            self.mediaplayer.video_set_spu(index - 1)
+        track_id = self.subtitle_panel.track_combo.itemData(index)
+        self.mediaplayer.video_set_spu(-1 if track_id is None else track_id)
             
     def loadExternalSubtitles(self):
         filename, _ = QFileDialog.getOpenFileName(self, "Load Subtitles",
                                                 "", "Subtitle Files (*.srt *.ass *.ssa)")
         if filename:
+            self.subtitle_file = filename
             self.mediaplayer.video_set_subtitle_file(filename)
             self.updateSubtitleTracks()
+
+    def subtitleFileFor(self, path):
+        # The loaded external file, or one next to the media with the same name
+        if self.subtitle_file:
+            return self.subtitle_file
+        base = os.path.splitext(path)[0]
+        for extension in ('.srt', '.vtt', '.ass', '.ssa'):
+            if os.path.exists(base + extension):
+                return base + extension
+        return None
+
+    def autoSyncSubtitles(self):
+        subtitle_path = self.subtitleFileFor(self.current_file) if self.current_file else None
+        if subtitle_path is None:
+            QMessageBox.information(self, "Auto Sync", "Load an external subtitle file first.")
+            return
+        self.subtitle_panel.sync_label.setText("Analyzing audio...")
+        # The result depends on the subtitle file as well as the media, so an
+        # edited or replaced subtitle file gets a new cache entry
+        try:
+            stat = os.stat(subtitle_path)
+            identity = f"{subtitle_path}|{stat.st_size}|{stat.st_mtime}"
+        except OSError:
+            identity = subtitle_path
+        kind = 'subsync-' + hashlib.sha1(identity.encode('utf-8')).hexdigest()[:12]
+        self.analysis_queue.submit(kind, self.current_file, analyzeSubtitleSync, subtitle_path)
             
     def selectSubtitleFont(self):
         font, ok = QFontDialog.getFont(self.subtitle_font, self)
@@ -0,0 +1,114 @@
+import functools
+import hashlib
+import http.server
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from rhythms import MediaCache
+except ImportError:
+    MediaCache = None
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@unittest.skipIf(MediaCache is None, "rhythms dependencies are not installed")
+class MediaCacheHttpTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.served = os.path.join(self.root, 'served')
+        self.directory = os.path.join(self.root, 'cache')
+        os.makedirs(self.served)
+        self.data = os.urandom(300 * 1024)
+        with open(os.path.join(self.served, 'track.mp3'), 'wb') as f:
+            f.write(self.data)
+        handler = functools.partial(QuietHandler, directory=self.served)
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/track.mp3"
+        self.caches = []
+
+    def tearDown(self):
+        for cache in self.caches:
+            cache.close()
+            cache.thread.join(timeout=5)
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root)
+
+    def createCache(self, **kwargs):
+        cache = MediaCache(self.directory, **kwargs)
+        self.caches.append(cache)
+        return cache
+
+    def waitForEntry(self, cache, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if cache.key(self.url) in cache.entries:
+                return
+            time.sleep(0.05)
+        self.fail("download did not finish")
+
+    def testMissThenHit(self):
+        cache = self.createCache()
+        self.assertEqual(cache.resolve(self.url), self.url)
+        self.waitForEntry(cache)
+        local = cache.resolve(self.url)
+        self.assertNotEqual(local, self.url)
+        with open(local, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['bytes_fetched'], len(self.data))
+
+    def testIndexSurvivesRestart(self):
+        cache = self.createCache()
+        cache.prefetch([self.url])
+        self.waitForEntry(cache)
+        restarted = self.createCache()
+        self.assertNotEqual(restarted.resolve(self.url), self.url)
+
+    def testBandwidthLimit(self):
+        cache = self.createCache(bandwidth=1024 * 1024)
+        start = time.monotonic()
+        cache.prefetch([self.url])
+        self.waitForEntry(cache)
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def testEvictionKeepsWithinLimit(self):
+        cache = self.createCache(max_bytes=400 * 1024)
+        with open(os.path.join(self.served, 'other.mp3'), 'wb') as f:
+            f.write(os.urandom(300 * 1024))
+        cache.prefetch([self.url])
+        self.waitForEntry(cache)
+        other = self.url.replace('track.mp3', 'other.mp3')
+        cache.prefetch([other])
+        deadline = time.monotonic() + 10
+        while cache.key(other) not in cache.entries and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertIn(cache.key(other), cache.entries)
+        self.assertNotIn(cache.key(self.url), cache.entries)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def testStartupCleanupOnlyTouchesCacheFiles(self):
+        os.makedirs(self.directory)
+        stale = hashlib.sha1(b'stale').hexdigest() + '.mp3'
+        for filename in (stale, stale + '.part', 'notes.txt'):
+            with open(os.path.join(self.directory, filename), 'w') as f:
+                f.write('x')
+        self.createCache()
+        self.assertEqual(os.listdir(self.directory), ['notes.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()